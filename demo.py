@@ -1,10 +1,18 @@
 # demo.py Main Demo.py 
 import time
 import logging
+import logging.handlers
+import signal
 from threading import Thread
 from ext_modbus_blueprint import ModbusWrapper
 
-logging.basicConfig(level=logging.INFO, format="%(message)s")
+# buffered logging to stderr: records are written in blocks of 64
+# (or at once for WARNING and above) instead of one write per line
+_console = logging.StreamHandler()
+_console.setFormatter(logging.Formatter("%(message)s"))
+_log_buffer = logging.handlers.MemoryHandler(capacity=64, flushLevel=logging.WARNING, target=_console)
+# force=True: replace any handler an earlier basicConfig() may have installed
+logging.basicConfig(level=logging.INFO, handlers=[_log_buffer], force=True)
 
 # --- PLC SETTINGS ---   
 PLC_IP = "192.168.1.22"
@@ -19,18 +27,25 @@ PLC_UNIT_ID = 0  # Graziano confirmed
 
 
 # create wrapper (auto_expand_words default = False -> no mass expansion)
-mw = ModbusWrapper(ip=PLC_IP, port=PLC_PORT, unit_id=PLC_UNIT_ID, variable_file="variables.txt")
+# timeout: explicit per-request wait, so a slow PLC answer is not taken for a dead link
+mw = ModbusWrapper(ip=PLC_IP, port=PLC_PORT, unit_id=PLC_UNIT_ID, timeout=0.8, variable_file="variables.txt")
 
 # STEP 1: Auto-polling group
 print("=== STEP 1: Auto-polling group ===")
 mw.add_polling_group("main", ["Word2", "Flag_RitVcc"], interval_ms=1000, max_cycles=0)
 
+# STEP 1b: Per-variable rate: the slow timer value only every 5 s
+# (aligned deadlines -> read together with 'main' on every 5th tick)
+print("=== STEP 1b: Per-variable watch ===")
+mw.watch("TimCorrente", poll_ms=5000)
+
 # STEP 2: Finite polling group (manual start)
 print("=== STEP 2: Finite polling group (must be started manually) ===")
 pg = mw.add_polling_group("page", ["Enable", "Preset"], interval_ms=500, max_cycles=5)
 
 
-def main():
+def setup():
+    """One-shot setup: connect and create the Word2 aliases."""
     # STEP 0: Try to connect
     print("=== STEP 0: Try to connect ===")
     if not mw.connect(retries=3, retry_delay=1.0):
@@ -44,12 +59,14 @@ def main():
     print("Created aliases:", created)
 
     # List the aliases we now have for Word2
-    print("Listing Word2-related aliases in mw.variables:")
-    aliases = [name for name in mw.variables.keys() if name.startswith("Word2_")]
-    for alias in sorted(aliases):
-        wrapper = mw.variables[alias]
-        print(f"  {alias:20s} -> {wrapper.address} ({wrapper.__class__.__name__})")
+    aliases = sorted(name for name in mw.variables.keys() if name.startswith("Word2_"))
+    logging.info("Listing Word2-related aliases in mw.variables:\n" + "\n".join(
+        f"  {alias:20s} -> {mw.variables[alias].address} ({mw.variables[alias].__class__.__name__})"
+        for alias in aliases))
+
 
+def main():
+    """Demo steps 3..7 (setup() must have run first)."""
     # STEP 3: Manual read
     print("=== STEP 3: Manual read test ===")
     try:
@@ -57,11 +74,19 @@ def main():
     except Exception as e:
         print("Manual read failed:", e)
 
-    # STEP 4: Manual write
+    # STEP 3b: Batched snapshot of every declared variable (one request per register run)
+    print("=== STEP 3b: Batched read of all variables ===")
+    try:
+        results = mw.read_vars(list(mw.variables))
+        logging.info("\n".join(f"  {n:20s} = {v}" for n, v in results.items()))
+    except Exception as e:
+        print("Batched read failed:", e)
+
+    # STEP 4: Manual write (batched: contiguous registers go out as one FC16)
     print("=== STEP 4: Manual write test ===")
     try:
-        mw.write_var("Preset", 42, force=True)
-        print("Preset written = 42")
+        to_write = {"Preset": 42, "Word2": 0}
+        print("write_vars ->", mw.write_vars(to_write, force=True))
     except Exception as e:
         print("Manual write failed:", e)
 
@@ -99,19 +124,27 @@ def main():
     except Exception as e:
         print("Byte/Word sync test failed:", e)
 
+    # STEP 6b: same aliases, staged and sent together (one Modbus write for the whole word)
+    print("=== STEP 6b: Staged writes + flush ===")
+    try:
+        mw.stage_var("Word2_LowByte", 0xCD, force=True)
+        mw.stage_var("Word2_HighByte", 0x34, force=True)
+        mw.stage_var("Word2_LowBit0", False, force=True)
+        print("flush ->", mw.flush())
+        print("After flush: Word2 =", hex(mw.read_var("Word2") or 0))
+    except Exception as e:
+        print("Staged write test failed:", e)
+
     # STEP 7: Integration idle loop (non-blocking)
     print("=== STEP 7: Integration-ready idle loop ===")
     print("Now the script keeps running (does NOT exit). Press CTRL+C to quit manually.")
+    _log_buffer.flush()  # show the buffered setup log now, don't wait for 64 records
 
 if __name__ == "__main__":
-    try:
-        while True:
-            if not mw.alive():
-                logging.debug("Main loop: PLC not connected, waiting...")
-                # Optional: try reconnect automatically (one attempt each loop)
-                mw.connect(retries=1, retry_delay=2.0)
-            else:
-                main()
-            time.sleep(2)
-    except KeyboardInterrupt:
-        print("Exiting demo...")
+    # CTRL+C -> close the wrapper, which makes keep_connected() return
+    signal.signal(signal.SIGINT, lambda *_: mw.close())
+    setup()  # STEP 0, 2b: once
+    main()   # STEP 3..7
+    # park until the link drops, then reconnect (polling groups resume by themselves)
+    mw.keep_connected(retry_delay=2.0)
+    print("Exiting demo...")
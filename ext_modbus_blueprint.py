@@ -6,36 +6,103 @@ Integrated Modbus wrapper:
   value]; // comment)
 - Instantiates wrapper objects (Flag, Word, Byte, DWord) imported from
   wrappers/ package you already created.
-- Builds address registry (canonical keys like MW100, MB6, MX8.0).
+- Builds address registry (keys are addresses packed into one int by address_key();
+  stringified only for logs).
 - Handles aliases (two names pointing to same address) by linking to same object.
 - Implements synchronization:
     MW <-> MB <-> MX (bits)
 - Implements alive() with retry policy (3 tries -> mark not alive and close)
-- Simple PollingGroup helper to run a background poll loop (default 500 ms).
+- Polling groups (Poller) driven by one shared scheduler thread (default 500 ms).
 - Honors initial values (:=) by not overwriting them in demo unless forced.
 """
 
+import itertools
 import os
+import pickle
+import queue
+import random
+import re
+import select
+import socket
+import struct
+import sys
 import time
 import logging
 import threading
+import weakref
+from array import array
+from collections import defaultdict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import Tuple, Optional
 
 from pyModbusTCP.client import ModbusClient
 
 # Import your wrappers (you said you already created them)
-from wrappers import Flag, Word, Byte, DWord
+from wrappers import Flag, Word, Byte, DWord, KIND_TIMER
+from wrappers.base import _VarBase, next_seq
 from polling.poller import Poller
 
-# Basic logger
-logging.basicConfig(level=logging.INFO)
+# Module logger: no basicConfig() here, handlers/levels are the application's choice.
+# Messages use %-style arguments (formatted only if the record is emitted).
+log = logging.getLogger(__name__)
 
+# pyModbusTCP client.last_error code for "the PLC answered with an exception"
+# (pyModbusTCP.constants.MB_EXCEPT_ERR); see _request_failed
+_MB_EXCEPT_ERR = 4
+
+# wrapper classes whose value setter does its own change tracking (see _store_value)
+_TRACKING_TYPES = frozenset((Flag, Word, Byte, DWord))
+
+# (address base, wrapper class) pairs whose decoded register value already has the
+# wrapper's own type (int word / 0..255 / 32-bit int / bool): read plans store it
+# straight into the slots, like the setter minus its coercion (see _compile_apply)
+_RAW_STORE = frozenset((("MW", Word), ("MB", Byte), ("MX", Flag), ("MD", DWord), ("IX", Flag)))
+
+# byte value -> its 8 bits (bit 0 first): MB -> MX fan-out is one lookup per byte
+_BYTE_TO_BITS = tuple(tuple(bool((v >> b) & 1) for b in range(8)) for v in range(256))
+
+
+
+# ---------------------------
+# Variables file line format
+# ---------------------------
+# Name AT %ADDR: TYPE [readonly] [:= init] [;] [// comment]
+# one variables.txt line per match, scanned over the whole file text (re.M):
+# [ \t] instead of \s so a match never runs into the next line;
+# a '//' comment line or a blank line matches with every group None,
+# anything else lands in 'bad' (logged and skipped)
+_VAR_RE = re.compile(
+    r"^[ \t]*(?://.*|"
+    r"(?P<name>\w+)[ \t]+(?i:AT)[ \t]+(?P<addr>%[A-Za-z]+\d+(?:\.\d+)?)[ \t]*:[ \t]*(?P<dtype>\w+)"
+    r"(?P<flags>(?:[ \t]+\w+)*)"
+    r"[ \t]*(?::=[ \t]*(?P<init>[^;/\n]*[^;/\s]))?[ \t]*;?[ \t]*(?://(?P<comment>.*))?"
+    r"|(?P<bad>.*?))[ \t]*$",
+    re.M,
+)
+# read-only markers in the comment: RO / readonly / read-only (whole words, any case)
+_RO_RE = re.compile(r"\b(?:ro|readonly|read-only)\b", re.I)
+
+
+def _int_or_raw(v):
+    """
+    int for integer literals ('42', '-7', '+3'), else v unchanged.
+    Checked with a branch instead of try/int()/except: non-numeric initial
+    values (e.g. 'T#5s') don't pay for raising an exception.
+    """
+    if isinstance(v, str):
+        s = v.strip()
+        if s and (s.isdecimal() or (s[0] in "+-" and s[1:].isdecimal())):
+            return int(s)
+        return s
+    return v
 
 
 # ---------------------------
 # Helper: parse address
 # ---------------------------
 
+@lru_cache(maxsize=8192)
 def parse_address(addr: str) -> Tuple[str, int, Optional[int]]:
     """
     Normalize addresses like:
@@ -45,127 +112,563 @@ def parse_address(addr: str) -> Tuple[str, int, Optional[int]]:
       %MD0    -> ('MD', 0, None)
       %IX0.0  -> ('IX', 0, 0)
     Returns (base, num, bit) where bit may be None
+    Memoized: the same few address strings are parsed over and over
+    (registry rebuilds, expansion, sync helpers).
     """
-    s = addr.strip()
-    if s.startswith("%"):
+    s = addr.strip().upper()
+    if s[:1] == "%":
         s = s[1:]
-    s = s.upper()
-
-    if "." in s:  # bit-address form: MX8.0 or IX0.0
-        base = s[:2]            # first two letters = base
-        left, bit_s = s.split(".", 1)
-        num = int(left[2:])     # digits after base up to the dot
-        bit = int(bit_s)
-        return base, num, bit
-    else:
-        base = s[:2]
-        num = int(s[2:])
-        return base, num, None
+    # base = first two letters; partition: no list allocation, "" bit = no bit part
+    num_s, dot, bit_s = s[2:].partition(".")
+    return s[:2], int(num_s, 10), (int(bit_s, 10) if dot else None)
+
+def address_key(base: str, num: int, bit: Optional[int]) -> int:
+    """
+    Registry key of a parsed address, packed into one int:
+      [base letter 1][base letter 2][32-bit number][bit, 0xFF = no bit]
+    ints hash to themselves: no tuple/str allocation or hashing per lookup.
+    Raises ValueError if the address does not fit the layout.
+    """
+    if len(base) != 2 or not base.isascii() or not 0 <= num <= 0xFFFFFFFF \
+            or (bit is not None and not 0 <= bit < 0xFF):
+        raise ValueError(f"Address out of range: {base}{num}" + ("" if bit is None else f".{bit}"))
+    return (ord(base[0]) << 48) | (ord(base[1]) << 40) | (num << 8) | (0xFF if bit is None else bit)
 
-def canonical_key(base: str, num: int, bit: Optional[int]) -> str:
-    """Return canonical registry key."""
+
+@lru_cache(maxsize=8192)
+def parse_and_key(addr: str) -> Tuple[str, int, Optional[int], int]:
+    """
+    parse_address() + address_key() in one memoized call: (base, num, bit, key).
+    Used wherever both are needed (wrapper creation, VarRec build): a registry
+    rebuild of already-seen addresses is one cache hit per variable.
+    """
+    base, num, bit = parse_address(addr)
+    return base, num, bit, address_key(base, num, bit)
+
+
+def split_key(key: int) -> Tuple[str, int, Optional[int]]:
+    """Inverse of address_key(): (base, num, bit)."""
+    bit = key & 0xFF
+    return chr(key >> 48) + chr((key >> 40) & 0xFF), (key >> 8) & 0xFFFFFFFF, (None if bit == 0xFF else bit)
+
+
+def _key_str(key: int) -> str:
+    """Registry key as text for log messages, e.g. 'MX8.0'."""
+    base, num, bit = split_key(key)
     if bit is None:
         return f"{base}{num}"
+    return f"{base}{num}.{bit}"
+
+
+# Modbus limits for a single read request
+MAX_READ_REGS = 125     # holding registers per read_holding_registers
+MAX_READ_BITS = 2000    # discrete inputs per read_discrete_inputs
+
+
+def register_span(base: str, num: int) -> Tuple[str, int, int]:
+    """
+    Map a parsed address onto the Modbus table/registers it is read from:
+      MW100 -> ('holding', 100, 1)
+      MB6   -> ('holding', 3, 1)      parent word = MB // 2
+      MX8.0 -> ('holding', 4, 1)      parent word = MX byte // 2
+      MD0   -> ('holding', 0, 2)
+      IX0.0 -> ('discrete', 0, 1)
+    Returns (table, start, count).
+    """
+    if base == "MW":
+        return "holding", num, 1
+    if base in ("MB", "MX"):
+        return "holding", num // 2, 1
+    if base == "MD":
+        return "holding", num, 2
+    if base == "IX":
+        return "discrete", num, 1
+    raise ValueError(f"Unsupported address base: {base}")
+
+
+# MD (DWORD) <-> 2 registers, endianness in one place: the 2 words are packed as
+# 4 bytes and read back as one 32-bit int (one C call each way, no shift/mask chains)
+#   low word first (default): (lo, hi) ~ '<HH' <-> '<I'
+#   high word first:          (hi, lo) ~ '>HH' <-> '>I'
+_MD_WORDS = {False: struct.Struct("<HH"), True: struct.Struct(">HH")}
+_MD_DWORD = {False: struct.Struct("<I"), True: struct.Struct(">I")}
+
+
+# pipelined reads (see _read_pipelined): request frame = MBAP header (tid, protocol 0,
+# length 6, unit) + fc, start, count; a reply starts with tid, protocol, length, unit
+_READ_FRAME = struct.Struct(">HHHBBHH")
+_REPLY_HEAD = struct.Struct(">HHHB")
+
+
+@lru_cache(maxsize=128)
+def _regs_struct(n):
+    """Struct of n big-endian registers (one per reply size, compiled once)."""
+    return struct.Struct(f">{n}H")
+
+
+def md_from_regs(regs, big_endian: bool = False) -> int:
+    """32-bit value from the 2 registers of an MD (regs in PLC order)."""
+    return _MD_DWORD[big_endian].unpack(_MD_WORDS[big_endian].pack(regs[0], regs[1]))[0]
+
+
+def md_to_regs(value, big_endian: bool = False) -> Tuple[int, int]:
+    """The 2 registers (PLC order) holding a 32-bit value; value is truncated to 32 bits."""
+    return _MD_WORDS[big_endian].unpack(_MD_DWORD[big_endian].pack(int(value) & 0xFFFFFFFF))
+
+
+# Per-variable metadata resolved once (address parsing, registry key, register span),
+# so the read/write hot paths don't re-parse "%MX8.0" strings on every call.
+# shift/mask: where the value sits inside its (first) register, None for MD/IX
+# decode: regs -> value, specialized per base when the record is built (None for MD:
+#         word order is the wrapper's md_big_endian, which may change at runtime)
+# guard: write guards packed in one int (0 = writable, the common case: one test)
+VarRec = namedtuple("VarRec", "address base num bit key table start count readonly shift mask decode guard")
+
+GUARD_READONLY = 1   # declared read-only (bypassed by force=True)
+GUARD_INITIAL = 2    # has a ':= value' initial value (bypassed by force=True)
+GUARD_INPUT = 4      # IX discrete input: never writable
+
+
+def _field_decoder(shift, mask):
+    return lambda regs: (regs[0] >> shift) & mask
+
+
+def _bit_decoder(shift):
+    mask = 1 << shift
+    return lambda regs: (regs[0] & mask) != 0
+
+
+def _input_decoder(regs):
+    return bool(regs[0])
+
+
+def make_var_rec(obj) -> VarRec:
+    """Resolve a wrapper's address once. table is None for bases with no register mapping."""
+    base, num, bit, key = parse_and_key(obj.address)
+    try:
+        table, start, count = register_span(base, num)
+    except ValueError:
+        table, start, count = None, num, 0
+    if base == "MW":
+        shift, mask = 0, 0xFFFF
+        decode = _field_decoder(shift, mask)
+    elif base == "MB":
+        shift, mask = (num & 1) * 8, 0xFF          # low byte = even MB index
+        decode = _field_decoder(shift, mask)
+    elif base == "MX":
+        shift, mask = (num & 1) * 8 + (bit or 0), 1
+        decode = _bit_decoder(shift)
     else:
-        return f"{base}{num}.{bit}"
+        shift, mask = 0, None
+        decode = _input_decoder if base == "IX" else None
+    guard = ((GUARD_READONLY if obj.readonly else 0)
+             | (GUARD_INITIAL if obj.initial_value is not None else 0)
+             | (GUARD_INPUT if base == "IX" else 0))
+    return VarRec(obj.address, base, num, bit, key,
+                  table, start, count, bool(obj.readonly), shift, mask, decode, guard)
+
+
+# ---------------------------
+# Holding register shadow
+# ---------------------------
+class RegisterShadow:
+    """
+    Last known content of the holding registers, one slot per Modbus address:
+    - words in one array('H') (2 bytes each, no int objects / dict entries per register)
+    - validity in a parallel bytearray (0 = unknown)
+    A batched read of N registers is stored with one slice copy.
+    """
+    SIZE = 0x10000   # 16-bit Modbus register address space
+    __slots__ = ("_raw", "_valid")
+
+    def __init__(self):
+        self._raw = array("H", bytes(2 * self.SIZE))
+        self._valid = bytearray(self.SIZE)
+
+    def store(self, start, values):
+        n = len(values)
+        if start < 0 or start + n > self.SIZE:
+            return
+        try:
+            self._raw[start:start + n] = array("H", values)
+            self._valid[start:start + n] = b"\x01" * n
+        except (OverflowError, TypeError):
+            self._valid[start:start + n] = bytes(n)   # not 16-bit words: forget them
+
+    def get(self, reg):
+        """Shadowed word, or None if unknown."""
+        if 0 <= reg < self.SIZE and self._valid[reg]:
+            return self._raw[reg]
+        return None
+
+    def clear(self):
+        self._valid = bytearray(self.SIZE)
+
+
+# ---------------------------
+# Raw register cache (short TTL)
+# ---------------------------
+_NEVER = float("-inf")   # store time of a slot that holds nothing
+
+
+class RegisterCache:
+    """
+    Short-TTL cache of raw values read from the PLC, per table in parallel arrays:
+    - values: array('H') for holding registers, bytearray for discrete inputs
+    - store times: array('d') of monotonic timestamps (_NEVER = not cached)
+    A run of N values is stored, checked (min() of its store times) and invalidated
+    with slice operations: no (table, register) dict entry and tuple per value.
+    A table's arrays are allocated on its first store.
+    """
+    SIZE = 0x10000   # 16-bit Modbus address space
+    __slots__ = ("_tables",)
+
+    def __init__(self):
+        self._tables = {}   # table -> (values, store times)
+
+    def store(self, table, start, values, now):
+        n = len(values)
+        if start < 0 or start + n > self.SIZE:
+            return
+        t = self._tables.get(table)
+        if t is None:
+            vals = array("H", bytes(2 * self.SIZE)) if table == "holding" else bytearray(self.SIZE)
+            t = self._tables[table] = (vals, array("d", [_NEVER]) * self.SIZE)
+        vals, ts = t
+        try:
+            vals[start:start + n] = array("H", values) if table == "holding" else bytes(values)
+        except (OverflowError, TypeError, ValueError):
+            ts[start:start + n] = array("d", [_NEVER]) * n   # not words / bits: forget them
+            return
+        ts[start:start + n] = array("d", [now]) * n
+
+    def lookup(self, table, start, count, max_age_s, now):
+        """Values of the whole span if all were stored less than max_age_s ago, else None."""
+        t = self._tables.get(table)
+        if t is None or count <= 0 or start < 0 or start + count > self.SIZE:
+            return None
+        vals, ts = t
+        if min(ts[start:start + count]) <= now - max_age_s:
+            return None
+        if table == "holding":
+            return vals[start:start + count].tolist()
+        return [v != 0 for v in vals[start:start + count]]
+
+    def invalidate(self, table, start, count=1):
+        t = self._tables.get(table)
+        if t is not None and start >= 0 and start + count <= self.SIZE:
+            t[1][start:start + count] = array("d", [_NEVER]) * count
+
+    def clear(self):
+        self._tables = {}
+
+
+# ---------------------------
+# FIFO client lock
+# ---------------------------
+class FifoLock:
+    """
+    Mutex granted in arrival order (threading.Lock makes no fairness promise:
+    a poller re-acquiring in a loop can overtake a waiting write again and again).
+    - uncontended: taken directly, no per-call allocation
+    - contended: each waiter parks on its own Lock; release() hands ownership
+      to the oldest waiter (it never goes back up for grabs)
+    Not reentrant, like threading.Lock.
+    """
+    __slots__ = ("_mutex", "_waiters", "_locked")
+
+    def __init__(self):
+        self._mutex = threading.Lock()
+        self._waiters = deque()
+        self._locked = False
+
+    def acquire(self) -> bool:
+        with self._mutex:
+            if not self._locked:
+                self._locked = True
+                return True
+            waiter = threading.Lock()
+            waiter.acquire()
+            self._waiters.append(waiter)
+        waiter.acquire()   # released by the previous holder: we own the lock now
+        return True
+
+    def release(self):
+        with self._mutex:
+            if self._waiters:
+                self._waiters.popleft().release()   # hand over, _locked stays True
+            else:
+                self._locked = False
+
+    def locked(self) -> bool:
+        return self._locked
+
+    __enter__ = acquire
+
+    def __exit__(self, *exc):
+        self.release()
 
 
 # ---------------------------
 # Timer wrapper (simple stub)
 # ---------------------------
-class TimerWrapper:
+class TimerWrapper(_VarBase):
     """
     Simple timer structure as requested by the client:
     stores an address for timer value, value, and a flag.
     (We create a basic structure; later we can map it to PWM/time registers).
     """
+    KIND = KIND_TIMER   # type code, like the wrappers/ classes
+    __slots__ = ("value", "flag")
+
     def __init__(self, name, address, description=""):
-        self.name = name
-        self.address = address
-        self.description = description
+        super().__init__(name, address, description)
         self.value = None       # numeric time (ms) or other
         self.flag = False       # boolean flag
-        self._changed = False
-        self.initial_value = None
 
     def update_value(self, v):
-        if self.value != v:
-            self._changed = True
-        self.value = v
+        if self.value != v:        # unchanged: no store at all, like the wrappers/ setters
+            self._changed = True   # -> new generation (see _VarBase)
+            self.value = v
 
-    def isChanged(self):
-        changed = self._changed
-        self._changed = False
-        return changed
 
+# wrapper class per declared type: one dict probe instead of an if/elif chain
+# (unknown types fall back to Word, see _instantiate_into)
+_WRAPPER_BY_DTYPE = {
+    "BOOL": Flag,
+    "BIT": Flag,
+    "WORD": Word,
+    "BYTE": Byte,
+    "DWORD": DWord,
+    "TIME": TimerWrapper,
+}
 
-# ---------------------------
-# Main Modbus wrapper class
-# ---------------------------
 
-class ModbusWrapper:
-    class ModbusWrapper:
-        def __init__(self, ip, port=502, unit_id=0, variable_file="variables.txt", auto_expand_words: bool = False):
-
-            # ASSUMPTION: Use pyModbusTCP client; auto_open False (we manage open)
-            self.host = ip
-            self.port = port
-            self.unit_id = unit_id
-            self.client = ModbusClient(
-                host=self.host,
-                port=self.port,
-                unit_id=self.unit_id,
-                auto_open=False,
-                auto_close=False
-            )
-            try:
-                self.client.debug = True
-            except Exception:
-                pass
-            self._last_plc_error = None
-            self.auto_expand_words = bool(auto_expand_words)
-            
-            self._client_lock = threading.RLock()  # Guards all socket I/O so it’s thread‑safe
-            self._vars_lock = threading.RLock()   # protects variables/registry/duplicates modifications
-
-            self.last_alive = None
-            self._alive_state = False
-            self._alive_lock = threading.Lock()
-            self.variables = {}      # name -> wrapper object (Flag/Word/Byte/DWord/TimerWrapper)
-            self.registry = {}       # canonical address key -> wrapper object
-            self.duplicates = {}     # canonical -> [names]
-            self._sync_lock = threading.RLock()  # guard to avoid recursive sync
-            self.md_big_endian = False  # False = low word first (most Delta PLCs).
-                                        # Set True if the real PLC expects hi word first.
-
-            # timing / breathing space for PLC after writes (seconds)
-            self.write_delay = 0.1   # legacy field (still supported)
-            self.read_delay = 0.1    # delay after reads if needed
-
-            # how long to wait after a successful write before next access (milliseconds)
-            self.write_settle_ms = 80  # Graziano wants waits inside the function
+# ModbusWrapper.shared() registry: (host, port, unit_id, variables file) -> wrapper.
+# Weak values: an instance nobody references any more leaves the registry by itself.
+_SHARED = weakref.WeakValueDictionary()
+_SHARED_LOCK = threading.Lock()
 
 
-            # polling groups: name -> dict { thread, interval_ms, vars, stop_event }
-            self.polling_groups = {}
+# the link monitor watches the socket only after this long without a transaction
+# (see ModbusWrapper._monitor_link)
+LINK_IDLE_S = 1.0
 
 
-            # allow relative defaults for the variables file
-            if variable_file and not os.path.isabs(variable_file):
-                variable_file = os.path.join(os.getcwd(), variable_file)
+# ---------------------------
+# Main Modbus wrapper class
+# ---------------------------
 
-            if variable_file:
-                parsed = self.parse_variables_file(variable_file)
-                self.instantiate_wrappers(parsed)
-                # build registry from instantiated wrappers
-                self.build_address_registry()
-                # log duplicates (aliases)
-                for k, names in self.duplicates.items():
-                    logging.warning(f"Alias detected: address {k} used by names {names}")
+class ModbusWrapper:
+    def __init__(self, ip, port=502, unit_id=0, variable_file="variables.txt", auto_expand_words: bool = False,
+                 timeout: float = 1.0, busy_retries: int = 3):
+
+        # ASSUMPTION: Use pyModbusTCP client; auto_open False (we manage open)
+        self.host = ip
+        self.port = port
+        self.unit_id = unit_id
+        # explicit per-request timeout (seconds): slow PLCs / serial gateways need more
+        # than short library defaults, otherwise a late reply looks like a dead link
+        self.timeout = float(timeout)
+        # retries of a request the PLC answered with exception 6 (SLAVE DEVICE BUSY)
+        self.busy_retries = int(busy_retries)
+        self.client = ModbusClient(
+            host=self.host,
+            port=self.port,
+            unit_id=self.unit_id,
+            timeout=self.timeout,
+            auto_open=False,
+            auto_close=False
+        )
+        try:
+            self.client.debug = True
+        except Exception:
+            pass
+        # is_open flavour, decided once per client class: a method in old pyModbusTCP /
+        # pymodbus, a property in pyModbusTCP >= 0.2 (see _client_is_open)
+        self._is_open_method = callable(getattr(type(self.client), "is_open", None))
+        self._last_plc_error = None
+        self.auto_expand_words = bool(auto_expand_words)
+        
+        # Guards all socket I/O so it’s thread‑safe. Not reentrant: every holder runs one
+        # request (or one pipelined burst) and never re-enters, no RLock owner bookkeeping.
+        # FIFO: callers get the socket in arrival order, a write queued behind a poll
+        # goes next instead of racing the following poll cycles
+        self._client_lock = FifoLock()
+        # minimum pause between two Modbus requests (some devices reject back-to-back
+        # requests); enforced in _req(), which every transaction goes through. 0 = no pause
+        self.min_gap_ms = 0
+        self._last_req_end = 0.0
+        # True while a transaction runs on self.client (set by _req / _read_pipelined):
+        # the link monitor leaves the socket alone meanwhile
+        self._in_txn = False
+        self._vars_lock = threading.RLock()   # serializes structural changes only (instantiate/expansion/registry rebuild); lookups never take it
+                                              # (RLock: expansion()/add_variable() call instantiate_wrappers() + build_address_registry() while holding it)
+
+        self.last_alive = None
+        self._alive_state = False
+        self._alive_lock = threading.Lock()
+        # alive() trusts a positive check for alive_check_ms without touching the socket
+        # (a dropped link is still seen at once: _set_dead() clears _alive_state)
+        self.alive_check_ms = 250
+        self._alive_check_deadline = 0.0
+        self._dead_evt = threading.Event()    # set while the link is down (wakes keep_connected)
+        self._dead_evt.set()
+        self._link_stop = threading.Event()   # set by close(): keep_connected() returns
+        self._connect_abort = threading.Event()   # set by close(): a connect() retry loop stops waiting
+        # reconnect backoff: exponential with full jitter, capped at max_retry_delay seconds
+        self.max_retry_delay = 30.0
+        self._connect_failures = 0            # consecutive failed connect attempts
+        self._unreachable_until = 0.0         # monotonic time before which connect() won't retry
+        self._connecting = False              # a connect() retry loop is running
+        self._connect_cond = threading.Condition()
+        # TCP keepalive on idle links: first probe after 5 s, then every 2 s, dead after 3 misses
+        # (a silently dropped PLC link is noticed in ~11 s instead of the OS default ~2 h)
+        self.keepalive_idle = 5
+        self.keepalive_interval = 2
+        self.keepalive_count = 3
+        self.variables = {}      # name -> wrapper object (Flag/Word/Byte/DWord/TimerWrapper)
+        self.registry = {}       # address_key(base, num, bit) -> wrapper object
+        self.duplicates = {}     # address_key -> (names,), aliased addresses only (built by build_address_registry)
+        self._vtbl = {}          # name -> VarRec (rebuilt with the registry)
+        # bumped by every change instantiate_wrappers() makes to variables; the registry
+        # remembers the version (+ dict identity/size) it was built from
+        self._vars_version = 0
+        self._registry_stamp = None
+        self._layout_gen = 0     # bumped by every registry rebuild (invalidates cached read plans)
+        self._read_plans = {}    # (names, max_gap) -> (layout_gen, [(table, start, span, apply)])
+        # batched reads: registers skipped between two variables before a new request
+        # is started (reading a few unused registers beats one more round trip);
+        # default of read_vars() and of every polling group
+        self.read_max_gap = 8
+        # polling groups reuse register-cache words younger than this fraction of their
+        # interval instead of reading them again (overlapping groups: one read; 0 = off)
+        self.poll_reuse_ratio = 0.5
+        # read every holding variable once after each (re)connect (see prime_shadow)
+        self.prime_on_connect = False
+        # bumped whenever a wrapper value is set outside a read plan (reads, writes, syncs)
+        # and once per read_vars() call: a plan may skip re-applying an unchanged run only
+        # while this is still the generation of its previous apply
+        self._gen_counter = itertools.count(1)
+        self._value_gen = 0
+        self._word_aliases = {}  # MW number -> [mw_obj, mb_low, mb_high, [mx_low x8], [mx_high x8], [(bit mask, mx_obj)], last synced word] or None (rebuilt with the registry)
+        # alias sync guards, striped by parent word (word & 63): syncs of unrelated
+        # words don't contend, the aliases of one word are never updated concurrently;
+        # snapshot() takes the same stripes, so it never sees a half-done fan-out
+        self._sync_stripes = [threading.Lock() for _ in range(64)]
+        self.md_big_endian = False  # False = low word first (most Delta PLCs).
+                                    # Set True if the real PLC expects hi word first.
+
+        # timing / breathing space for PLC after writes (seconds)
+        self.write_delay = 0.1   # legacy field (still supported)
+        self.read_delay = 0.1    # delay after reads if needed
+
+        # how long to wait after a successful write before next access (milliseconds)
+        self.write_settle_ms = 80  # Graziano wants waits inside the function
+        # ... as a deadline per written register: the NEXT read/write of that register
+        # waits out the rest (inside that function), writes elsewhere don't wait at all
+        self._settle_until = {}    # holding register -> monotonic deadline
+
+        # short-TTL cache of raw words / inputs with their store time (see RegisterCache)
+        # cache_ttl_ms=None -> use the fastest running polling interval (0 = no cache)
+        self._reg_cache = RegisterCache()
+        self.cache_ttl_ms = None
+        # per-variable override of the TTL above: name -> ms (e.g. a slow setpoint
+        # read often by user code: {"Preset": 2000}); 0 = always read that variable live
+        self.read_cache_ms = {}
+
+        # shadow of the holding registers: last word read from / written to the PLC
+        # on this connection (no TTL; cleared when the link is marked dead).
+        # MB/MX writes patch the shadowed word instead of re-reading it first.
+        # Set shadow_writes=False if the PLC program itself writes to the same words.
+        self._mw_shadow = RegisterShadow()
+        self.shadow_writes = True
+
+        # extra sockets for concurrent non-contiguous writes in write_vars()
+        # io_connections=1 -> everything goes through self.client (no extra sockets)
+        self.io_connections = 1
+        self._io_pool = None              # ThreadPoolExecutor, created on first use
+        self._conn_pool = queue.Queue()   # idle extra ModbusClient objects (checkout/checkin)
+        self._conn_count = 0              # extra clients currently open
+        self._conn_lock = threading.Lock()
+
+        # pipelined reads: read_vars() sends up to pipeline_depth requests back to back on
+        # self.client's socket and matches the replies by MBAP transaction id
+        # (1 = off: one request per round trip; raise only if the PLC queues requests;
+        # not used while min_gap_ms > 0)
+        self.pipeline_depth = 1
+        self._pipe_tid = 0
+        # reused frame buffers of the pipelined reads (only touched under _client_lock):
+        # TX grows to pipeline_depth frames, RX holds one ADU (7-byte header + PDU <= 253)
+        self._pipe_tx = bytearray()
+        self._pipe_rx = bytearray(260)
+        # a PLC that does not queue requests answers only the first frame of a burst:
+        # after this many incomplete bursts in a row pipelining is switched off
+        # (pipeline_depth = 1, warning logged) instead of paying for it every cycle; 0 = never
+        self.pipeline_max_misses = 3
+        self._pipe_misses = 0
+
+        # writes queued by stage_var(), sent by flush()
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+
+
+        # polling groups: name -> Poller (all driven by one shared PollScheduler thread)
+        self.polling_groups = {}
+        # serializes add/replace/stop of groups: a replaced group's in-flight tick is
+        # waited for before a new group with the same name is created
+        self._groups_lock = threading.Lock()   # add/stop_polling_group never nest
+
+
+        # allow relative defaults for the variables file
+        if variable_file and not os.path.isabs(variable_file):
+            variable_file = os.path.join(os.getcwd(), variable_file)
+
+        if variable_file:
+            parsed = self.load_parsed_variables(variable_file)
+            self.instantiate_wrappers(parsed)
+            # build registry from instantiated wrappers
+            self.build_address_registry()
+            # log duplicates (aliases)
+            for k, names in self.duplicates.items():
+                log.warning("Alias detected: address %s used by names %s", _key_str(k), list(names))
 
     # ---------------------------
     # Parser (handles := defaults and readonly marker in comment)
     # ---------------------------
+    # bump when the parsed-dict layout or the parsing rules change, so stale sidecar caches are ignored
+    _PARSE_CACHE_VERSION = 4
+
+    def load_parsed_variables(self, filepath: str):
+        """
+        parse_variables_file() memoized in a '<file>.cache' pickle sidecar.
+        - Cache is valid only for the same file size + mtime_ns (and cache version)
+        - Any cache problem (missing, stale, unreadable, not writable) -> plain parse
+        Only the parsed dicts are cached; wrappers are always instantiated fresh.
+        """
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            return self.parse_variables_file(filepath)   # logs "not found"
+        stamp = (self._PARSE_CACHE_VERSION, st.st_size, st.st_mtime_ns)
+        cache_path = filepath + ".cache"
+
+        try:
+            with open(cache_path, "rb") as f:
+                cached_stamp, parsed = pickle.load(f)
+            if cached_stamp == stamp:
+                return parsed
+        except Exception:
+            pass
+
+        parsed = self.parse_variables_file(filepath)
+        try:
+            with open(cache_path, "wb") as f:
+                pickle.dump((stamp, parsed), f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError as e:
+            log.debug("variables cache not written (%s): %s", cache_path, e)
+        return parsed
+
     def parse_variables_file(self, filepath: str):
         """
         Parse lines like:
@@ -175,79 +678,48 @@ class ModbusWrapper:
         - readonly detected if 'RO', 'read-only', or 'readonly' present in comment (case-insensitive)
         OR if 'readonly' appears inline after the type in variables.txt
         Returns list of dicts with keys name,address,dtype,description,initial_value,readonly
+        The whole file is scanned by one _VAR_RE.finditer() pass (no per-line
+        split/strip, no per-line match call).
         """
         parsed = []
-        if not os.path.exists(filepath):
-            logging.error(f"Variables file not found: {filepath}")
+        # open() and catch: no separate exists() stat before the open
+        try:
+            with open(filepath, "r", encoding="utf-8") as f:
+                text = f.read()     # one read; text mode folds \r\n into \n
+        except FileNotFoundError:
+            log.error("Variables file not found: %s", filepath)
             return parsed
 
-        with open(filepath, "r", encoding="utf-8") as f:
-            for raw in f:
-                line = raw.strip()
-                if not line or line.startswith("//"):
-                    continue
+        # hot names as locals (no global / attribute lookup per line)
+        ro_search = _RO_RE.search
+        append = parsed.append
+        intern = sys.intern     # one shared "WORD"/"BOOL"/... string per type, not one per line
+
+        for m in _VAR_RE.finditer(text):
+            name, address, dtype, flags, init, description, bad = m.group(
+                "name", "addr", "dtype", "flags", "init", "comment", "bad")
+            if name is None:
+                if bad:
+                    log.error("Unrecognized format (skipping): %s", bad)
+                continue    # blank line or '//' comment line
+            description = (description or "").strip()
+
+            initial_value = _int_or_raw(init) if init else None
+
+            readonly = (
+                ro_search(description) is not None
+                or "readonly" in flags.lower().split()       # inline after the type
+                or address.upper().startswith("%IX")         # 🔹 discrete inputs are read-only
+            )
 
-                description = ""
-                if "//" in line:
-                    code_part, comment = line.split("//", 1)
-                    description = comment.strip()
-                else:
-                    code_part = line
-
-                # remove trailing semicolon if present
-                code_part = code_part.strip().rstrip(";").strip()
-                initial_value = None
-                readonly = False
-
-                # detect initial ':='
-                if ":=" in code_part:
-                    before, after = code_part.split(":=", 1)
-                    code_part = before.strip()
-                    try:
-                        initial_value = int(after.strip())
-                    except Exception:
-                        initial_value = after.strip()
-
-                # detect read-only markers in description
-                desc_lower = (description or "").lower()
-                if (
-                    "ro" in desc_lower.split()
-                    or "read-only" in desc_lower
-                    or "readonly" in desc_lower
-                ):
-                    readonly = True
-
-                # now parse 'Name AT %ADDR: TYPE'
-                try:
-                    if "AT" not in code_part or ":" not in code_part:
-                        logging.error(f"Unrecognized format (skipping): {raw.strip()}")
-                        continue
-                    name_part, rest = code_part.split("AT", 1)
-                    name = name_part.strip()
-                    addr_part, dtype_part = rest.split(":", 1)
-                    address = addr_part.strip()
-
-                    # split dtype part into tokens to detect inline 'readonly'
-                    dtype_tokens = dtype_part.strip().split()
-                    dtype = dtype_tokens[0].upper() if dtype_tokens else ""
-                    if any(tok.lower() == "readonly" for tok in dtype_tokens[1:]):
-                        readonly = True
-
-                    # 🔹 Mark IX (discrete inputs) as read-only automatically
-                    addr_clean = address.strip()
-                    if addr_clean.upper().startswith("%IX"):
-                        readonly = True
-
-                    parsed.append({
-                        "name": name,
-                        "address": address,
-                        "dtype": dtype,
-                        "description": description,
-                        "initial_value": initial_value,
-                        "readonly": readonly
-                    })
-                except Exception as e:
-                    logging.error(f"Failed to parse line: {raw.strip()} -> {e}")
+            append({
+                "name": name,
+                "address": address,
+                "dtype": intern(dtype.upper()),
+                "description": description,
+                "initial_value": initial_value,
+                "readonly": readonly
+            })
 
         return parsed
 
@@ -255,39 +727,120 @@ class ModbusWrapper:
     # ---------------------------
     # PATCH#3 - Helper functions
     # ---------------------------
+    @staticmethod
+    def _exception_reply(client) -> bool:
+        """True if the last request of client was answered with a Modbus exception."""
+        return bool(getattr(client, "last_except", None)) and \
+            getattr(client, "last_error", None) == _MB_EXCEPT_ERR
+
+    def _request_failed(self, reason: str, client=None):
+        """
+        A request got no usable reply. If the PLC did answer, with a Modbus exception
+        (illegal address / value, ...), the link itself is fine: log it and keep the
+        socket (dropping it would mean one reconnect per poll of a bad address).
+        Anything else (timeout, socket error, garbage) -> _set_dead().
+        client: the connection that sent the request (default self.client)
+        """
+        if client is None:
+            client = self.client
+        if self._exception_reply(client):
+            log.error("%s: PLC exception reply %s (link kept)", reason, client.last_except)
+            return
+        self._set_dead(reason)
+
     def _set_dead(self, reason: str = ""):
         try:
             self._alive_state = False
+            self._dead_evt.set()      # wake keep_connected() right away
+            self._reg_cache.clear()   # words cached before the failure are stale
+            self._mw_shadow.clear()
             # try to get client last_error if available
             last_err = getattr(self.client, "last_error", None)
             self._last_plc_error = last_err
             unit = getattr(self.client, "unit_id", getattr(self, "unit_id", None))
-            logging.error(
-                f"Connection marked NOT ALIVE. reason='{reason}' host={self.host}:{self.port} unit={unit} last_error={last_err}"
+            log.error(
+                "Connection marked NOT ALIVE. reason='%s' host=%s:%s unit=%s last_error=%s",
+                reason, self.host, self.port, unit, last_err
             )
             try:
                 self.client.close()
             except Exception:
                 pass
+            self._close_conn_pool()
         except Exception:
             pass
 
 
         
-    def _set_value(self, obj, new_value):
-        """Assign value and toggle 'changed' if supported by wrapper."""
-        try:
-            old = getattr(obj, "value", None)
-            if old != new_value:
-                # common pattern: wrappers may have a private flag or isChanged method
-                # We just set _changed if it exists; .isChanged() will clear it later.
+    def set_timeout(self, seconds: float):
+        """Change the per-request timeout at runtime (main client, extra connections, open sockets)."""
+        self.timeout = float(seconds)
+        clients = [self.client] + list(self._conn_pool.queue)
+        for cli in clients:
+            try:
+                cli.timeout = self.timeout
+            except Exception:
+                pass
+            sock = self._client_sock(cli)
+            if sock is not None:
                 try:
-                    setattr(obj, "_changed", True)
-                except Exception:
+                    sock.settimeout(self.timeout)
+                except OSError:
                     pass
+
+    def _req(self, fn, *args):
+        """
+        Run ONE Modbus request (fn = bound client method).
+        If the PLC answers exception 6 (SLAVE DEVICE BUSY) the request is retried
+        up to busy_retries times after a short pause, instead of being reported
+        as a failure (which would mark the link dead and force a reconnect).
+        With min_gap_ms > 0 it first waits until that long after the previous request.
+        """
+        if self.min_gap_ms:
+            wait = self._last_req_end + self.min_gap_ms / 1000.0 - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+        client = getattr(fn, "__self__", self.client)
+        main = client is self.client
+        if main:
+            self._in_txn = True
+        try:
+            res = fn(*args)
+            for attempt in range(self.busy_retries):
+                if (res is not None and res is not False) or getattr(client, "last_except", None) != 6:
+                    break
+                time.sleep(0.01 * (attempt + 1))
+                res = fn(*args)
+            if res is not None and res is not False and main:
+                # an answered request proves the link as well as alive()'s socket check:
+                # restart its grace window (busy polling never reaches the slow path)
+                self._alive_check_deadline = time.monotonic() + self.alive_check_ms / 1000.0
+            return res
+        finally:
+            self._last_req_end = time.monotonic()
+            if main:
+                self._in_txn = False
+
+    def _set_value(self, obj, new_value):
+        """Assign value and toggle 'changed' if supported by wrapper."""
+        self._value_gen = next(self._gen_counter)
+        self._store_value(obj, new_value)
+
+    def _store_value(self, obj, new_value):
+        """_set_value() without the value generation bump (read plans track their own)."""
+        if type(obj) in _TRACKING_TYPES:
+            # Flag/Byte/Word/DWord setters coerce and bump the change generation
+            # themselves: no probing, no extra _changed flag, nothing that raises
             obj.value = new_value
+            return
+        # TimerWrapper (plain value slot): every wrapper is a _VarBase, so value and
+        # the _changed view always exist; no getattr/setattr probing, no inner try
+        try:
+            if obj.value != new_value:
+                obj._changed = True   # new change stamp (see _VarBase._changed)
+                obj.value = new_value
         except Exception as e:
-            logging.error(f"_set_value failed for {getattr(obj,'name','?')}: {e}")
+            log.error("_set_value failed for %s: %s", getattr(obj,'name','?'), e)
             
             
     def _client_is_open(self):
@@ -295,14 +848,68 @@ class ModbusWrapper:
         Compatibility wrapper for pyModbusTCP/pymodbus differences in is_open.
         Returns True if the underlying socket is open, False otherwise.
         """
-        is_open_attr = getattr(self.client, "is_open", None)
         try:
-            # Callable style (method)
-            return is_open_attr() if callable(is_open_attr) else bool(is_open_attr)
+            # Callable style (method) vs property: decided once in __init__
+            if self._is_open_method:
+                return self.client.is_open()
+            return bool(self.client.is_open)
         except Exception:
             # Fallback: check private socket handle
             return getattr(self.client, "_client_socket", None) is not None
-        
+
+    def _client_sock(self, client=None):
+        """
+        Underlying socket object of a Modbus client (default self.client), or None.
+        pyModbusTCP >= 0.2 keeps it in `_sock`, older releases in a name-mangled `__sock`.
+        """
+        client = client or self.client
+        for attr in ("_sock", "_ModbusClient__sock", "_client_socket"):
+            sock = getattr(client, attr, None)
+            if isinstance(sock, socket.socket):
+                return sock
+        return None
+
+    def _tune_socket(self, client=None):
+        """
+        Called once after a successful open():
+        - TCP_NODELAY: Modbus frames are tiny, Nagle would hold them back (~40 ms on Linux)
+        - SO_KEEPALIVE: let the OS notice a dead PLC link on an idle connection,
+          probing after keepalive_idle s, every keepalive_interval s, keepalive_count
+          times (TCP_KEEPIDLE/KEEPINTVL/KEEPCNT where available; OS default: 2 h idle)
+        - TCP_QUICKACK (Linux only): don't delay the ACK of the first replies (the kernel
+          clears it again on its own; afterwards the next request carries the ACK)
+        - TCP_USER_TIMEOUT (Linux only) = the keepalive window: keepalive probes are
+          not sent while a request is still unacknowledged, so without it a link that
+          dies mid-request is only dropped after the kernel's retransmissions (minutes)
+        - socket timeout = self.timeout
+        """
+        sock = self._client_sock(client)
+        if sock is None:
+            # unknown client layout: Nagle stays on, requests may wait ~40 ms each
+            log.warning("Modbus client socket not found, TCP_NODELAY/keepalive not applied")
+            return
+        try:
+            sock.settimeout(self.timeout)
+        except OSError:
+            pass
+        opts = [(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+                (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+        for name, val in (("TCP_KEEPIDLE", self.keepalive_idle),
+                          ("TCP_KEEPINTVL", self.keepalive_interval),
+                          ("TCP_KEEPCNT", self.keepalive_count)):
+            if hasattr(socket, name):
+                opts.append((socket.IPPROTO_TCP, getattr(socket, name), int(val)))
+        if hasattr(socket, "TCP_QUICKACK"):
+            opts.append((socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1))
+        if hasattr(socket, "TCP_USER_TIMEOUT"):
+            window_s = self.keepalive_idle + self.keepalive_interval * self.keepalive_count
+            opts.append((socket.IPPROTO_TCP, socket.TCP_USER_TIMEOUT, int(window_s * 1000)))
+        for level, opt, val in opts:
+            try:
+                sock.setsockopt(level, opt, val)
+            except OSError as e:
+                log.debug("setsockopt(%s) failed: %s", opt, e)
+
         
     def _extract_registers(self, read_res):
         """
@@ -312,6 +919,8 @@ class ModbusWrapper:
         - object with .registers
         Return list or None
         """
+        if type(read_res) is list:
+            return read_res   # pyModbusTCP: a fresh list per call, no probing / copy
         if read_res is None:
             return None
         if hasattr(read_res, "registers"):
@@ -331,6 +940,8 @@ class ModbusWrapper:
         - object with .bits -> list(bits)
         - list/tuple -> list
         """
+        if type(read_res) is list:
+            return read_res   # pyModbusTCP: a fresh list per call, no probing / copy
         if read_res is None:
             return None
         if hasattr(read_res, "bits"):
@@ -346,6 +957,8 @@ class ModbusWrapper:
         
     def _write_ok(self, write_res):
         """Normalise different write result types to a boolean success/fail."""
+        if write_res is True or write_res is False:
+            return write_res   # pyModbusTCP: plain bool, no attribute probing
         if write_res is None:
             return False
         # pymodbus style: object with isError()
@@ -370,29 +983,103 @@ class ModbusWrapper:
                 if hasattr(self.client, "read_device_identification"):
                     return self.client.read_device_identification()
         except Exception as e:
-            logging.debug(f"identify() failed: {e}")
+            log.debug("identify() failed: %s", e)
         return None
 
     def is_changed(self, name: str) -> bool:
         """
         Return True if the variable has changed since the last polling cycle.
-        Delegates to the underlying wrapper's .isChanged() if available.
+        Delegates to the underlying wrapper's .isChanged() (every wrapper has one).
         """
-        with self._vars_lock:
-            obj = self.variables.get(name)
+        obj = self.variables.get(name)      # lock-free: the dict is published whole (see instantiate_wrappers)
 
         if obj is None:
-            logging.warning(f"is_changed: Variable '{name}' not found")
+            log.warning("is_changed: Variable '%s' not found", name)
             return False
 
-        if hasattr(obj, "isChanged"):
-            try:
-                return obj.isChanged()
-            except Exception as e:
-                logging.error(f"is_changed failed for {name}: {e}")
-                return False
+        try:
+            return obj.isChanged()
+        except Exception as e:
+            log.error("is_changed failed for %s: %s", name, e)
+            return False
 
-        return False
+    @staticmethod
+    def change_seq() -> int:
+        """
+        Current position of the change sequence: every value change after this call
+        gets a higher number. Save it and pass it to changed_since() later.
+        """
+        return next_seq()
+
+    def changed_since(self, seq: int) -> list:
+        """
+        Names of the variables whose value changed after seq (a change_seq() result):
+        one int compare per wrapper, nothing is reset (isChanged() flags untouched),
+        so several consumers can each keep their own seq.
+        """
+        if next_seq() == seq + 1:
+            # no stamp handed out since seq (no value change anywhere, no other
+            # change_seq() call): nothing to scan
+            return []
+        # plain dict scan: measured faster than parallel name/wrapper tuples walked with
+        # attrgetter/compress (per-item C calls cost more than the inline attribute load)
+        return [name for name, obj in self.variables.items() if obj._gen > seq]
+
+    def changed_bits(self, names, seq: int) -> int:
+        """
+        Change bitmap of a name list: bit i set if names[i] changed after seq (a
+        change_seq() result). One int for the whole list: 0 = nothing changed, and
+        bit tests / popcount replace a list of flags (e.g. a screen page keeps one
+        bitmap per refresh). Unknown names read as unchanged.
+        """
+        if next_seq() == seq + 1:
+            return 0   # no stamp handed out since seq
+        variables = self.variables
+        bits = 0
+        bit = 1
+        for name in names:
+            obj = variables.get(name)
+            if obj is not None and obj._gen > seq:
+                bits |= bit
+            bit <<= 1
+        return bits
+
+    def consume_changed(self, names) -> int:
+        """
+        isChanged() for a whole name list in one call: bit i set if names[i] changed
+        since its last isChanged()/consume_changed(), and those flags are reset
+        (e.g. a scanner thread taking the changes of its page once per pass).
+        - each wrapper's stamp is read once: a change written by the polling thread
+          during the scan is reported by the next call, never lost
+        - unknown names read as unchanged
+        """
+        variables = self.variables
+        bits = 0
+        bit = 1
+        for name in names:
+            obj = variables.get(name)
+            if obj is not None:
+                g = obj._gen
+                if g != obj._seen_gen:
+                    obj._seen_gen = g
+                    bits |= bit
+            bit <<= 1
+        return bits
+
+    @staticmethod
+    def bit_indices(bits: int) -> list:
+        """
+        Indices of the set bits of a changed_bits()/consume_changed() bitmap, in order:
+        for i in mw.bit_indices(bits): handle(names[i]).
+        One step per SET bit (lowest bit isolated with bits & -bits), not per name:
+        with ~1% of a long list changing, the walk is over the changes only.
+        """
+        out = []
+        while bits:
+            low = bits & -bits
+            out.append(low.bit_length() - 1)
+            bits ^= low
+        return out
 
         
     # ---------------------------
@@ -406,159 +1093,157 @@ class ModbusWrapper:
 
         If replace=True the function will reset self.variables/self.registry (used at startup).
         If replace=False it will add to the existing registry (used for on-the-fly variables).
+        Call build_address_registry() afterwards: it derives the duplicates map (aliases).
+        Either way the dicts are built aside and published at the end (copy-on-write):
+        lock-free readers (_lookup, is_changed, pollers) see the old set or the new one,
+        never a half-built one, and code iterating self.variables never sees it grow.
         """
         with self._vars_lock:
+            version = self._vars_version
             if replace:
-                self.variables = {}
-                self.registry = {}
-                self.duplicates = {}
-
-            for v in parsed_vars:
-                name = v["name"]
-                address = v["address"]
-                dtype = v["dtype"]
-                desc = v["description"]
-                init = v["initial_value"]
-                readonly = v["readonly"]
-
-                # allow a marker to avoid duplicate auto-expansion
-                auto_generated = v.get("auto_generated", False)
-
-                base, num, bit = parse_address(address)
-                key = canonical_key(base, num, bit)
-
-                # If an object already exists for this address, use it (alias)
-                existing = self.registry.get(key)
-                if existing:
-                    self.variables[name] = existing
-                    self.duplicates.setdefault(key, [])
-                    if name not in self.duplicates[key]:
-                        self.duplicates[key].append(name)
-                    if init is not None:
-                        if getattr(existing, "initial_value", None) is None:
-                            existing.initial_value = init
-                        if getattr(existing, "value", None) is None:
-                            try:
-                                existing.value = int(init)
-                            except Exception:
-                                existing.value = init
-                    continue
+                variables, registry = {}, {}
+            else:
+                variables, registry = dict(self.variables), dict(self.registry)
+            self._instantiate_into(parsed_vars, variables, registry)
+            if replace or self._vars_version != version:
+                # (nothing new on replace=False: keep the published dicts, and the
+                # registry built from them stays valid, see build_address_registry)
+                self.registry = registry
+                self.variables = variables
+
+    def _instantiate_into(self, parsed_vars, variables, registry):
+        """
+        instantiate_wrappers() body: create wrappers for parsed_vars into the given dicts.
+        Auto-expansion aliases go to the front of the work list (one loop, no recursion),
+        so they are still created right after their parent word/byte, as before.
+        """
+        work = deque(parsed_vars)
+        intern = sys.intern
+        while work:
+            v = work.popleft()
+            # interned: the variables key, obj.name and name literals in the application
+            # are one object, so lookups match on identity (no string compare)
+            name = intern(v["name"])
+            # address and description interned too: repeated comments in variables.txt
+            # share one string, and the address is the key of parse_address()'s cache
+            address = intern(v["address"])
+            dtype = v["dtype"]
+            desc = intern(v["description"])
+            init = v["initial_value"]
+            readonly = v["readonly"]
+
+            # allow a marker to avoid duplicate auto-expansion
+            auto_generated = v.get("auto_generated", False)
+
+            base, num, bit, key = parse_and_key(address)
+
+            # If an object already exists for this address, use it (alias)
+            existing = registry.get(key)
+            if existing:
+                if variables.get(name) is not existing:
+                    variables[name] = existing   # listed in duplicates by build_address_registry()
+                    self._vars_version += 1
+                if init is not None:
+                    if getattr(existing, "initial_value", None) is None:
+                        existing.initial_value = init
+                    if getattr(existing, "value", None) is None:
+                        existing.value = _int_or_raw(init)
+                continue
 
-                # create appropriate wrapper
-                if dtype in ("BOOL", "BIT"):
-                    obj = Flag(name, address, desc)
-                elif dtype == "WORD":
-                    obj = Word(name, address, desc)
-                elif dtype == "BYTE":
-                    obj = Byte(name, address, desc)
-                elif dtype == "DWORD":
-                    obj = DWord(name, address, desc)
-                elif dtype == "TIME":
-                    obj = TimerWrapper(name, address, desc)
-                else:
-                    logging.warning(f"Unsupported type {dtype} for {name}, defaulting to Word")
-                    obj = Word(name, address, desc)
+            # create appropriate wrapper
+            cls = _WRAPPER_BY_DTYPE.get(dtype)
+            if cls is None:
+                log.warning("Unsupported type %s for %s, defaulting to Word", dtype, name)
+                cls = Word
+            obj = cls(name, address, desc)
+
+            obj.initial_value = init
+            obj.readonly = readonly
+            if init is not None:
+                obj.value = _int_or_raw(init)
+
+            variables[name] = obj
+            registry[key] = obj
+            self._vars_version += 1
+
+
+            # -----------------------------------------------------
+            # 🔹 Auto-expansion logic (Word -> Byte -> Bit) - gated
+            # -----------------------------------------------------
+            # Expand only if explicitly requested (via v["expand"] == True)
+            # OR if wrapper was created with global auto_expand_words True.
+            should_expand = self.auto_expand_words or v.get("expand", False)
+
+            if should_expand and not auto_generated:
+                if dtype == "WORD":
+                    # compute MB indices
+                    low_byte = num * 2
+                    high_byte = num * 2 + 1
+
+                    aliases = [
+                        {
+                            "name": f"{name}_LowByte",
+                            "address": f"%MB{low_byte}",
+                            "dtype": "BYTE",
+                            "description": f"Auto low byte of {name}",
+                            "initial_value": None,
+                            "readonly": readonly,
+                            "auto_generated": True,
+                        },
+                        {
+                            "name": f"{name}_HighByte",
+                            "address": f"%MB{high_byte}",
+                            "dtype": "BYTE",
+                            "description": f"Auto high byte of {name}",
+                            "initial_value": None,
+                            "readonly": readonly,
+                            "auto_generated": True,
+                        },
+                    ]
+                    # bit aliases
+                    for b in range(8):
+                        aliases.append({
+                            "name": f"{name}_LowBit{b}",
+                            "address": f"%MX{low_byte}.{b}",
+                            "dtype": "BOOL",
+                            "description": f"Auto low bit {b} of {name}",
+                            "initial_value": None,
+                            "readonly": readonly,
+                            "auto_generated": True,
+                        })
+                        aliases.append({
+                            "name": f"{name}_HighBit{b}",
+                            "address": f"%MX{high_byte}.{b}",
+                            "dtype": "BOOL",
+                            "description": f"Auto high bit {b} of {name}",
+                            "initial_value": None,
+                            "readonly": readonly,
+                            "auto_generated": True,
+                        })
+
+                    log.info("Auto-expanded %s (%%MW%s) → %%MB%s, %%MB%s", name, num, low_byte, high_byte)
+                    # instantiate aliases next (same pass, without replacing registry)
+                    work.extendleft(reversed(aliases))
 
-                obj.initial_value = init
-                obj.readonly = readonly
-                if init is not None:
-                    try:
-                        if hasattr(obj, "value"):
-                            obj.value = int(init)
-                        else:
-                            obj.value = init
-                    except Exception:
-                        obj.value = init
-
-                self.variables[name] = obj
-                self.registry[key] = obj
-                self.duplicates.setdefault(key, [name])
-
-
-                # -----------------------------------------------------
-                # 🔹 Auto-expansion logic (Word -> Byte -> Bit) - gated
-                # -----------------------------------------------------
-                # Expand only if explicitly requested (via v["expand"] == True)
-                # OR if wrapper was created with global auto_expand_words True.
-                should_expand = self.auto_expand_words or v.get("expand", False)
-
-                if should_expand and not auto_generated:
-                    if dtype == "WORD":
-                        # compute MB indices
-                        low_byte = num * 2
-                        high_byte = num * 2 + 1
-
-                        aliases = [
-                            {
-                                "name": f"{name}_LowByte",
-                                "address": f"%MB{low_byte}",
-                                "dtype": "BYTE",
-                                "description": f"Auto low byte of {name}",
-                                "initial_value": None,
-                                "readonly": readonly,
-                                "auto_generated": True,
-                            },
-                            {
-                                "name": f"{name}_HighByte",
-                                "address": f"%MB{high_byte}",
-                                "dtype": "BYTE",
-                                "description": f"Auto high byte of {name}",
-                                "initial_value": None,
-                                "readonly": readonly,
-                                "auto_generated": True,
-                            },
-                        ]
-                        # bit aliases
-                        for b in range(8):
-                            aliases.append({
-                                "name": f"{name}_LowBit{b}",
-                                "address": f"%MX{low_byte}.{b}",
-                                "dtype": "BOOL",
-                                "description": f"Auto low bit {b} of {name}",
-                                "initial_value": None,
-                                "readonly": readonly,
-                                "auto_generated": True,
-                            })
-                            aliases.append({
-                                "name": f"{name}_HighBit{b}",
-                                "address": f"%MX{high_byte}.{b}",
-                                "dtype": "BOOL",
-                                "description": f"Auto high bit {b} of {name}",
-                                "initial_value": None,
-                                "readonly": readonly,
-                                "auto_generated": True,
-                            })
-
-                        logging.info(f"Auto-expanded {name} (%MW{num}) → %MB{low_byte}, %MB{high_byte}")
-                        # instantiate aliases without replacing registry
-                        self.instantiate_wrappers(aliases, replace=False)
-
-                    elif dtype == "BYTE":
-                        # If a BYTE is explicitly created with expand=True, create its bits.
-                        bit_base = num
-                        aliases = []
-                        for b in range(8):
-                            aliases.append({
-                                "name": f"{name}_Bit{b}",
-                                "address": f"%MX{bit_base}.{b}",
-                                "dtype": "BOOL",
-                                "description": f"Auto bit {b} of {name}",
-                                "initial_value": None,
-                                "readonly": readonly,
-                                "auto_generated": True,
-                            })
-                        logging.info(f"Auto-expanded {name} (%MB{num}) → %MX{num}.0–%MX{num}.7")
-                        self.instantiate_wrappers(aliases, replace=False)
-
-
-                # -----------------------------------------------------
-                # 🔹 Sync new expansions to parent (optional but cleaner)
-                # -----------------------------------------------------
-                if dtype == "WORD" and init is not None:
-                    try:
-                        self._sync_mw_to_mb_mx(num)
-                    except Exception as e:
-                        logging.debug(f"Initial sync failed for MW{num}: {e}")
+                elif dtype == "BYTE":
+                    # If a BYTE is explicitly created with expand=True, create its bits.
+                    bit_base = num
+                    aliases = []
+                    for b in range(8):
+                        aliases.append({
+                            "name": f"{name}_Bit{b}",
+                            "address": f"%MX{bit_base}.{b}",
+                            "dtype": "BOOL",
+                            "description": f"Auto bit {b} of {name}",
+                            "initial_value": None,
+                            "readonly": readonly,
+                            "auto_generated": True,
+                        })
+                    log.info("Auto-expanded %s (%%MB%s) → %%MX%s.0–%%MX%s.7", name, num, num, num)
+                    work.extendleft(reversed(aliases))
+
+            # initial word values reach their byte/bit aliases in build_address_registry()
+            # (one pass over the rebuilt alias table, see _sync_all_words)
 
 
 
@@ -578,20 +1263,18 @@ class ModbusWrapper:
         created = []
 
         for vn in var_names:
-            with self._vars_lock:
-                obj = self.variables.get(vn)
-            if not obj:
-                logging.warning(f"expansion(): variable '{vn}' not found, skipping")
-                continue
-
             try:
-                base, num, bit = parse_address(obj.address)
+                obj, rec = self._lookup(vn)     # address parsed once (VarRec)
             except Exception as e:
-                logging.warning(f"expansion(): cannot parse address for {vn}: {e}")
+                log.warning("expansion(): cannot parse address for %s: %s", vn, e)
                 continue
+            if not obj:
+                log.warning("expansion(): variable '%s' not found, skipping", vn)
+                continue
+            base, num = rec.base, rec.num
 
             if base != "MW":
-                logging.warning(f"expansion(): variable '{vn}' is not a Word (base={base}), skipping")
+                log.warning("expansion(): variable '%s' is not a Word (base=%s), skipping", vn, base)
                 continue
 
             low_b = num * 2
@@ -639,7 +1322,7 @@ class ModbusWrapper:
                 })
 
         if not parsed_aliases:
-            logging.info("expansion(): no aliases generated")
+            log.info("expansion(): no aliases generated")
             return []
 
         with self._vars_lock:
@@ -648,7 +1331,7 @@ class ModbusWrapper:
             for a in parsed_aliases:
                 created.append(a["name"])
 
-        logging.info(f"expansion(): created aliases for {', '.join(var_names)}")
+        log.info("expansion(): created aliases for %s", ', '.join(var_names))
         return created
 
     # alias() is a friendly synonym for expansion()
@@ -662,27 +1345,101 @@ class ModbusWrapper:
     # Build registry (recompute) - handy if dynamic reload needed
     # ---------------------------
     
-    def build_address_registry(self):
-        # Rebuild canonical registry and duplicate mapping from current self.variables.
+    def build_address_registry(self, force: bool = False):
+        """
+        Rebuild canonical registry and duplicate mapping from current self.variables.
+        - No-op if variables did not change since the last build (e.g. add_variable()
+          of a name that already exists, expansion() of an expanded word)
+        - force=True: rebuild anyway (needed after replacing an entry of
+          self.variables by hand; added/removed names are noticed by the size check)
+        """
         with self._vars_lock:
-            self.registry = {}
-            self.duplicates = {}
+            stamp = (self._vars_version, id(self.variables), len(self.variables))
+            if not force and stamp == self._registry_stamp:
+                return
+            self._registry_stamp = stamp
+            registry = {}
+            shared = []   # (key, name) of every name whose address is already taken
+            vtbl = {}
+            # hot names as locals (one pass over up to ~19 entries per expanded word)
+            make_rec = make_var_rec
+            registry_get = registry.get
+            share = shared.append
             for name, obj in self.variables.items():
-                # parse the obj.address
+                # parse the obj.address once and keep the resolved record
                 try:
-                    base, num, bit = parse_address(obj.address)
-                    key = canonical_key(base, num, bit)
-                    if key in self.registry:
-                        # alias: multiple names pointing to same object
-                        self.duplicates.setdefault(key, [])
-                        if name not in self.duplicates[key]:
-                            self.duplicates[key].append(name)
-                    else:
-                        self.registry[key] = obj
-                        self.duplicates.setdefault(key, [name])
+                    rec = make_rec(obj)
                 except Exception:
                     continue
-                
+                vtbl[name] = rec
+                key = rec.key
+                if registry_get(key) is None:
+                    registry[key] = obj
+                    continue
+                # alias: multiple names pointing to same object (folded below, no per-name scan)
+                share((key, name))
+            by_key = defaultdict(list)
+            for key, name in shared:
+                by_key[key].append(name)
+            # first owner of the address first; dict.fromkeys drops a repeated owner name
+            duplicates = {key: tuple(dict.fromkeys((registry[key].name, *names)))
+                          for key, names in by_key.items()}
+            self.registry, self.duplicates, self._vtbl = registry, duplicates, vtbl
+            self._build_word_aliases()
+            self._sync_all_words()
+            self._layout_gen += 1
+
+    def _build_word_aliases(self):
+        """
+        Precompute, per holding word, the registry objects that alias it:
+        [MW object, MB low, MB high, 8 MX bits of the low byte, 8 MX bits of the high byte,
+         declared MX bits only as (bit mask within the word, object),
+         word value last pushed to the aliases (None = unknown),
+         change stamp taken after that push (an alias stamped later was set locally)]
+        (None where nothing is declared). The sync helpers then work on these
+        lists instead of probing up to 18 registry keys per call.
+        Stored as a dict keyed by word number: declared addresses can be sparse and
+        large (up to 32 bits), a list indexed by word number could be huge.
+        """
+        words = {}
+        for key, obj in self.registry.items():
+            base, num, bit = split_key(key)
+            if base not in ("MW", "MB", "MX"):
+                continue
+            word = num if base == "MW" else num // 2
+            entry = words.get(word)
+            if entry is None:
+                entry = words[word] = [None, None, None, [None] * 8, [None] * 8, [], None, 0]
+            if base == "MW":
+                entry[0] = obj
+            elif base == "MB":
+                entry[1 + (num & 1)] = obj
+            elif bit is not None and 0 <= bit < 8:
+                entry[3 + (num & 1)][bit] = obj
+                entry[5].append((1 << ((num & 1) * 8 + bit), obj))
+        self._word_aliases = words
+
+    def _sync_all_words(self):
+        """
+        Push every known MW value to its MB/MX aliases, one pass over the alias table
+        (after a rebuild all entries start as "never synced"):
+        - initial values (:= in variables.txt) show up on the byte/bit aliases
+        - aliases created by expansion() start from the word instead of None
+        Words not read yet (value None) are left alone.
+        """
+        stripes = self._sync_stripes
+        sync = self._sync_mw_to_mb_mx
+        for word, entry in self._word_aliases.items():
+            if entry is None or entry[0] is None or entry[0].value is None:
+                continue
+            if entry[1] is None and entry[2] is None and not entry[5]:
+                continue   # word without aliases
+            with stripes[word & 63]:
+                try:
+                    sync(word)
+                except Exception as e:
+                    log.debug("Initial sync failed for MW%s: %s", word, e)
+
 
 
     # ---------------------------
@@ -699,12 +1456,24 @@ class ModbusWrapper:
 
         Poller will use this: if False, it skips silently.
         Manual reads/writes will raise if alive() is False.
+        Fast path: within alive_check_ms of the last positive check (or of the last
+        answered request, see _req) the answer is the cached _alive_state (one
+        attribute read, no lock, no syscall).
         """
+        if self._alive_state and time.monotonic() < self._alive_check_deadline:
+            return True
         with self._alive_lock:
             try:
                 if self._client_is_open():
+                    # pending socket error (RST, keepalive timeout...) -> really gone
+                    sock = self._client_sock()
+                    err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) if sock is not None else 0
+                    if err:
+                        self._set_dead(f"socket error {err}")
+                        return False
                     self._alive_state = True
                     self.last_alive = time.time()
+                    self._alive_check_deadline = time.monotonic() + self.alive_check_ms / 1000.0
                     return True
             except Exception:
                 pass
@@ -714,41 +1483,376 @@ class ModbusWrapper:
             return False
 
 
+    @classmethod
+    def shared(cls, ip, port=502, unit_id=0, variable_file="variables.txt", **kwargs):
+        """
+        One wrapper per PLC for the whole process: the first call creates it (kwargs
+        passed to __init__), later calls with the same host/port/unit/variables file
+        return that same instance, so every part of the program (and every polling
+        group) shares one socket and one client lock instead of opening a session each
+        (small PLCs run out of TCP sessions). kwargs of later calls are ignored.
+        """
+        key = (ip, int(port), unit_id, os.path.abspath(variable_file) if variable_file else None)
+        with _SHARED_LOCK:
+            mw = _SHARED.get(key)
+            if mw is None:
+                mw = cls(ip, port=port, unit_id=unit_id, variable_file=variable_file, **kwargs)
+                _SHARED[key] = mw
+            return mw
+
     def connect(self, retries: int = 3, retry_delay: float = 1.0) -> bool:
         """
         Try to (re)connect with optional retries.
 
         - retries > 0 : try N times, return True if connected, False if not.
         - retries = 0 : try forever until connected (blocking).
-        - retry_delay : seconds between attempts.
+        - retry_delay : base of the backoff: the wait after the n-th consecutive
+          failure is random(0, min(max_retry_delay, retry_delay * 2**(n-1)))
+          (exponential backoff with full jitter; failures count across calls).
 
         Use this from the main program when you want to (re)connect.
+        Already connected -> returns True at once (the socket is kept open).
+        Called again while still backing off -> returns False at once without
+        touching the network (retries=0 waits for the backoff to end instead).
+        """
+        if self.alive():
+            return True
+
+        # single flight: a caller arriving while another thread is connecting waits
+        # for that attempt and reuses its outcome (connected, or backing off)
+        # instead of opening a second socket / running its own retry loop
+        # (retries > 0: wait at most about as long as its own attempts would take)
+        deadline = time.monotonic() + retries * (self.timeout + retry_delay) if retries > 0 else None
+        with self._connect_cond:
+            while self._connecting:
+                left = None if deadline is None else deadline - time.monotonic()
+                if left is not None and left <= 0:
+                    return False   # the other thread is still trying
+                self._connect_cond.wait(left)
+            if self.alive():
+                return True
+            wait = self._unreachable_until - time.monotonic()
+            if wait > 0 and retries > 0:
+                return False
+            self._connect_abort.clear()   # a close() from now on aborts this attempt
+            self._connecting = True
+        try:
+            return self._connect_loop(retries, retry_delay, wait)
+        finally:
+            with self._connect_cond:
+                self._connecting = False
+                self._connect_cond.notify_all()
+
+    def _connect_loop(self, retries, retry_delay, wait):
         """
+        connect()'s retry loop (runs in one thread at a time).
+        Backoff waits are Event waits: close() ends them at once (returns False).
+        """
+        if wait > 0 and self._connect_abort.wait(wait):
+            return False
+
         attempt = 0
         while True:
             attempt += 1
             try:
                 ok = self.client.open()
                 if ok and self._client_is_open():
+                    self._tune_socket()
+                    self._mw_shadow.clear()   # new session: nothing known about the PLC words yet
+                    self._connect_failures = 0
+                    self._unreachable_until = 0.0
                     self._alive_state = True
                     self.last_alive = time.time()
-                    logging.info(f"Connected to {self.host}:{self.port}")
+                    self._dead_evt.clear()
+                    self._start_link_monitor()
+                    log.info("Connected to %s:%s", self.host, self.port)
+                    if self.prime_on_connect:
+                        try:
+                            self.prime_shadow()
+                        except Exception as e:
+                            log.warning("Shadow priming failed: %s", e)
                     return True
             except Exception as e:
-                logging.warning(f"connect(): attempt {attempt} failed -> {e}")
+                log.warning("connect(): attempt %s failed -> %s", attempt, e)
 
+            self._connect_failures += 1
+            backoff = random.uniform(0, min(self.max_retry_delay,
+                                            retry_delay * 2 ** (self._connect_failures - 1)))
             if retries > 0 and attempt >= retries:
                 self._alive_state = False
+                self._unreachable_until = time.monotonic() + backoff
                 return False
 
-            time.sleep(retry_delay)
+            if self._connect_abort.wait(backoff):
+                log.info("connect(): aborted by close()")
+                return False
 
+    def _start_link_monitor(self):
+        sock = self._client_sock()
+        if sock is None:
+            return
+        threading.Thread(target=self._monitor_link, args=(sock,),
+                         name="modbus-link-monitor", daemon=True).start()
+
+    def _monitor_link(self, sock):
+        """
+        Watch the socket for EOF/error while the link is idle, then mark it dead.
+        - Modbus TCP is strictly request/response: an idle socket only becomes
+          readable when the PLC closes it (or resets it)
+        - while requests are flowing (a transaction running, or one ended less than
+          LINK_IDLE_S ago) the socket is not watched at all: every reply would wake
+          the monitor, and the transactions notice a closed link themselves
+        - a wakeup caused by a transaction that started during the select() is
+          dropped; EOF is told apart from pending bytes with a non-blocking MSG_PEEK
+          (no client lock taken, nothing consumed)
+        - the select() timeout only lets the thread notice that the socket was replaced/closed
+        """
+        while True:
+            if self._client_sock() is not sock:
+                return   # reconnected on a new socket / closed deliberately
+            quiet = time.monotonic() - self._last_req_end
+            if self._in_txn or quiet < LINK_IDLE_S:
+                time.sleep(LINK_IDLE_S - quiet if 0 <= quiet < LINK_IDLE_S else LINK_IDLE_S)
+                continue
+            started = self._last_req_end
+            try:
+                r, _, x = select.select([sock], [], [sock], 5.0)
+            except (OSError, ValueError):
+                return   # socket closed under us
+            if self._client_sock() is not sock:
+                return
+            if not r and not x:
+                continue
+            if self._in_txn or self._last_req_end != started:
+                continue   # woken by a transaction's reply: the link is busy again
+            try:
+                data = sock.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT)
+            except BlockingIOError:
+                continue   # reply consumed meanwhile
+            except (OSError, ValueError):
+                data = b""
+            if not data:
+                self._set_dead("connection closed by peer")
+                return
+            # stray bytes while idle: left to the next transaction, looked at again
+            # after LINK_IDLE_S (no tight loop on a socket that stays readable)
+            time.sleep(LINK_IDLE_S)
+
+    def keep_connected(self, retry_delay: float = 2.0):
+        """
+        Blocking reconnect supervisor (run it from the main program once setup is done).
+        - Sleeps until the link is marked dead (no periodic wakeups while connected)
+        - Then retries connect() with exponential backoff (base retry_delay,
+          capped at max_retry_delay) until it is back
+        - Returns after close()
+        """
+        self._link_stop.clear()
+        while not self._link_stop.is_set():
+            self._dead_evt.wait()
+            if self._link_stop.is_set():
+                break
+            if not self.connect(retries=1, retry_delay=retry_delay):
+                self._link_stop.wait(max(0.0, self._unreachable_until - time.monotonic()))
+
+    def close(self):
+        """Close the connection: keep_connected() returns, the link monitor exits with the socket."""
+        self._link_stop.set()
+        self._connect_abort.set()
+        self._alive_state = False
+        self._dead_evt.set()
+        try:
+            self.client.close()
+        except Exception:
+            pass
+        self._close_conn_pool()
 
-        
     def last_error(self):
         """Return the last PLC error stored (or None if none)."""
         return self._last_plc_error
+
+    # ---------------------------
+    # Extra connections (concurrent writes)
+    # ---------------------------
+    def _borrow_client(self):
+        """
+        Check out an idle extra connection, opening a new one while fewer than
+        io_connections - 1 are open. Returns None if none is available
+        (caller then falls back to self.client).
+        """
+        try:
+            return self._conn_pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._conn_lock:
+            if self._conn_count >= self.io_connections - 1:
+                return None
+            self._conn_count += 1
+        cli = ModbusClient(host=self.host, port=self.port, unit_id=self.unit_id,
+                           timeout=self.timeout, auto_open=False, auto_close=False)
+        try:
+            ok = cli.open()
+        except Exception as e:
+            log.warning("extra connection open failed -> %s", e)
+            ok = False
+        if not ok:
+            with self._conn_lock:
+                self._conn_count -= 1
+            return None
+        self._tune_socket(cli)
+        return cli
+
+    def _return_client(self, cli, healthy: bool = True):
+        """Check a borrowed connection back in (closed and dropped if it failed)."""
+        if healthy:
+            self._conn_pool.put(cli)
+            return
+        try:
+            cli.close()
+        except Exception:
+            pass
+        with self._conn_lock:
+            self._conn_count -= 1
+
+    def _close_conn_pool(self):
+        while True:
+            try:
+                cli = self._conn_pool.get_nowait()
+            except queue.Empty:
+                break
+            self._return_client(cli, healthy=False)
+
+    def _write_run(self, start, values):
+        """
+        Write one run of consecutive holding registers (FC6 for one word, FC16 otherwise).
+        Uses a borrowed extra connection if available, else self.client. Returns True on success.
+        A failure is reported through _request_failed() (an exception reply keeps the link).
+        """
+        cli = self._borrow_client() if self.io_connections > 1 else None
+        try:
+            if cli is not None:
+                res_raw = (self._req(cli.write_single_register, start, values[0]) if len(values) == 1
+                           else self._req(cli.write_multiple_registers, start, values))
+            else:
+                with self._client_lock:
+                    res_raw = (self._req(self.client.write_single_register, start, values[0]) if len(values) == 1
+                               else self._req(self.client.write_multiple_registers, start, values))
+            log.debug("write_vars(%s, %s) -> %s", start, values, res_raw)
+            ok = self._write_ok(res_raw)
+        except Exception as e:
+            log.error("PLC batched write failed: %s", e)
+            ok = False
+        kept = ok
+        if not ok:
+            kept = self._exception_reply(cli if cli is not None else self.client)
+            self._request_failed(f"batched write {start}+{len(values)} failed", cli)
+        if cli is not None:
+            self._return_client(cli, kept)
+        return ok
     
+    # ---------------------------
+    # Pipelined reads (several Modbus transactions in flight on one socket)
+    # ---------------------------
+    @staticmethod
+    def _recv_into(sock, view, n):
+        """Fill view[:n] from sock (into a reused buffer: no bytes object per call)."""
+        got = 0
+        while got < n:
+            k = sock.recv_into(view[got:n])
+            if not k:
+                raise ConnectionError("connection closed by PLC")
+            got += k
+
+    def _pipeline_outcome(self, complete: bool):
+        """Count incomplete pipelined bursts; fall back to one request per round trip after pipeline_max_misses."""
+        if complete:
+            self._pipe_misses = 0
+            return
+        self._pipe_misses += 1
+        if self.pipeline_max_misses and self._pipe_misses >= self.pipeline_max_misses:
+            log.warning("pipelined reads incomplete %d times in a row: PLC does not seem to "
+                        "queue requests, pipeline_depth %s -> 1", self._pipe_misses, self.pipeline_depth)
+            self.pipeline_depth = 1
+            self._pipe_misses = 0
+
+    def _read_pipelined(self, reqs):
+        """
+        reqs: [(table, start, count)] with table 'holding' (FC3) or 'discrete' (FC2).
+        - Frames are built here (MBAP header, own transaction ids); a sliding window
+          keeps up to pipeline_depth requests in flight: the first window goes out with
+          one sendall(), then each reply frees a slot for the next request (no wait
+          for the slowest reply of a window before sending more)
+        - Replies are matched by transaction id; unknown ids (late replies) are dropped,
+          and so are replies from another unit id
+        - A socket error or timeout with requests still in flight marks the link dead
+          (_set_dead): their replies must not reach the next request on the socket
+        - Frames are packed into / received into buffers reused across calls
+          (pack_into/recv_into/unpack_from: no bytes objects per request or reply)
+        Returns {index: data} for the requests that succeeded; anything missing
+        (exception reply, socket error, no raw socket) is left to the normal path.
+        """
+        out = {}
+        depth = max(1, int(self.pipeline_depth))
+        with self._client_lock:
+            sock = self._client_sock()
+            if sock is None:
+                return out
+            size = _READ_FRAME.size
+            if len(self._pipe_tx) < depth * size:
+                self._pipe_tx = bytearray(depth * size)
+            tx = memoryview(self._pipe_tx)
+            rx = self._pipe_rx
+            rx_view = memoryview(rx)
+            pending = {}   # tid -> index in reqs
+            nxt = 0        # next request to send
+            self._in_txn = True
+            try:
+                while nxt < len(reqs) or pending:
+                    n = 0
+                    while nxt < len(reqs) and len(pending) < depth:
+                        table, start, count = reqs[nxt]
+                        self._pipe_tid = (self._pipe_tid + 1) & 0xFFFF
+                        fc = 3 if table == "holding" else 2
+                        _READ_FRAME.pack_into(tx, n * size, self._pipe_tid, 0, 6, self.unit_id, fc, start, count)
+                        pending[self._pipe_tid] = nxt
+                        nxt += 1
+                        n += 1
+                    if n:
+                        sock.sendall(tx[:n * size])
+                    self._recv_into(sock, rx_view, 7)
+                    tid, proto, length, unit = _REPLY_HEAD.unpack_from(rx)
+                    if not 2 <= length <= 254:
+                        raise ConnectionError(f"bad MBAP length {length}")
+                    self._recv_into(sock, rx_view[7:], length - 1)
+                    i = pending.pop(tid, None)
+                    if i is None or rx[7] & 0x80:
+                        continue   # stale reply or exception response -> normal path
+                    if proto != 0 or unit != self.unit_id:
+                        # answer from another unit behind a gateway: not this request's data
+                        log.debug("pipelined read: reply tid %d from unit %d (proto %d) ignored",
+                                  tid, unit, proto)
+                        continue
+                    table, start, count = reqs[i]
+                    nbytes = max(0, min(rx[8], length - 3))   # PDU: fc, byte count, payload
+                    if table == "holding":
+                        data = list(_regs_struct(nbytes // 2).unpack_from(rx, 9))
+                    else:
+                        data = [bool(rx[9 + (b >> 3)] >> (b & 7) & 1) for b in range(min(count, nbytes * 8))]
+                    if len(data) >= count:
+                        out[i] = data
+            except (OSError, ConnectionError, struct.error, IndexError) as e:
+                log.debug("pipelined read aborted: %s", e)
+                if pending:
+                    # requests still in flight: their late replies would reach the next
+                    # normal request on this socket (foreign tid); drop the link while
+                    # still holding the client lock, keep_connected() reconnects
+                    self._set_dead(f"pipelined read aborted with {len(pending)} request(s) in flight: {e}")
+            finally:
+                # the burst was this socket's last transaction: min_gap_ms of the next
+                # _req() counts from here
+                self._last_req_end = time.monotonic()
+                self._in_txn = False
+        return out
+
     # ---------------------------
     # Read and Write low-level functions
     # ---------------------------
@@ -759,120 +1863,255 @@ class ModbusWrapper:
         if not self.alive():  # Ensure PLC connection is open
             return None
 
+        if self._settle_until and base != "IX":
+            try:
+                _, start, count = register_span(base, num)
+                self._settle_wait(start, count)
+            except ValueError:
+                pass
+
         try:
             # --- MW (Word: 16-bit register) ---
             if base == "MW":
                 with self._client_lock:
-                    regs_raw = self.client.read_holding_registers(num, 1)
+                    regs_raw = self._req(self.client.read_holding_registers, num, 1)
                 regs = self._extract_registers(regs_raw)
                 if not regs:
-                    self._set_dead(f"read MW{num} failed")
+                    self._request_failed(f"read MW{num} failed")
                     return None
+                self._cache_store("holding", num, regs[:1])
                 return regs[0]
 
             # --- MB (Byte: half of a Word) ---
             elif base == "MB":
                 with self._client_lock:
-                    regs_raw = self.client.read_holding_registers(num // 2, 1)
+                    regs_raw = self._req(self.client.read_holding_registers, num // 2, 1)
                 regs = self._extract_registers(regs_raw)
                 if not regs:
-                    self._set_dead(f"read MB{num} failed")
+                    self._request_failed(f"read MB{num} failed")
                     return None
+                self._cache_store("holding", num // 2, regs[:1])
                 word_val = regs[0]
-                return (word_val & 0xFF) if num % 2 == 0 else ((word_val >> 8) & 0xFF)
+                return (word_val >> ((num & 1) * 8)) & 0xFF
 
             # --- MX (Bit inside a Byte) ---
             elif base == "MX":
                 with self._client_lock:
-                    regs_raw = self.client.read_holding_registers(num // 2, 1)
+                    regs_raw = self._req(self.client.read_holding_registers, num // 2, 1)
                 regs = self._extract_registers(regs_raw)
                 if not regs:
-                    self._set_dead(f"read MX{num}.{bit} failed")
+                    self._request_failed(f"read MX{num}.{bit} failed")
                     return None
+                self._cache_store("holding", num // 2, regs[:1])
                 word_val = regs[0]
-                byte_val = (word_val >> ((num % 2) * 8)) & 0xFF
-                return bool((byte_val >> bit) & 1)
+                return bool((word_val >> ((num & 1) * 8 + bit)) & 1)
 
             # --- MD (Double Word: 32-bit) ---
             elif base == "MD":
                 with self._client_lock:
-                    regs_raw = self.client.read_holding_registers(num, 2)
+                    regs_raw = self._req(self.client.read_holding_registers, num, 2)
                 regs = self._extract_registers(regs_raw)
                 if not regs or len(regs) != 2:
-                    self._set_dead(f"read MD{num} failed")
+                    self._request_failed(f"read MD{num} failed")
                     return None
-                if getattr(self, "md_big_endian", False):
-                    return (regs[0] << 16) | regs[1]  # hi, lo
-                else:
-                    return (regs[1] << 16) | regs[0]  # lo, hi (default)
+                self._cache_store("holding", num, regs[:2])
+                return md_from_regs(regs, self.md_big_endian)
 
             # --- IX (Discrete input: read-only bit) ---
             elif base == "IX":
                 with self._client_lock:
-                    bits_raw = self.client.read_discrete_inputs(num, 1)
+                    bits_raw = self._req(self.client.read_discrete_inputs, num, 1)
                 bits = self._extract_bits(bits_raw)
                 if not bits:
-                    self._set_dead(f"read IX{num} failed")
+                    self._request_failed(f"read IX{num} failed")
                     return None
+                self._cache_store("discrete", num, bits[:1])
                 return bool(bits[0])
 
         except Exception as e:
-            logging.error(f"PLC read failed: {e}")
+            log.error("PLC read failed: %s", e)
             self._set_dead(f"exception in read {base}{num}")
             return None
-        
+
+    def _read_rec(self, rec):
+        """
+        Read one variable from its pre-resolved VarRec: one request for its
+        register span, decoded with the precomputed shift/mask.
+        Same failure handling as read_from_plc (None + link marked dead).
+        """
+        if not self.alive() or rec.table is None:
+            return None
+        if self._settle_until and rec.table == "holding":
+            self._settle_wait(rec.start, rec.count)
+        try:
+            with self._client_lock:
+                if rec.table == "holding":
+                    data = self._extract_registers(self._req(self.client.read_holding_registers, rec.start, rec.count))
+                else:
+                    data = self._extract_bits(self._req(self.client.read_discrete_inputs, rec.start, rec.count))
+            if not data or len(data) < rec.count:
+                self._request_failed(f"read {rec.address} failed")
+                return None
+            self._cache_store(rec.table, rec.start, data[:rec.count])
+            return self._decode_rec(rec, data)
+        except Exception as e:
+            log.error("PLC read failed: %s", e)
+            self._set_dead(f"exception in read {rec.address}")
+            return None
+
+    def _decode_rec(self, rec, regs):
+        """Decode a VarRec's value from the registers of its span (rec.decode, chosen once per variable)."""
+        if rec.decode is not None:
+            return rec.decode(regs)
+        return self._decode_regs(rec.base, rec.num, rec.bit, regs)
+
+    def _decode_regs(self, base, num, bit, regs):
+        """
+        Decode a value from the registers/bits returned for register_span(base, num).
+        Same byte/bit/endianness rules as read_from_plc.
+        """
+        if base == "MW":
+            return regs[0]
+        if base == "MB":
+            return (regs[0] >> ((num & 1) * 8)) & 0xFF
+        if base == "MX":
+            return bool((regs[0] >> ((num & 1) * 8 + bit)) & 1)
+        if base == "MD":
+            return md_from_regs(regs, self.md_big_endian)
+        if base == "IX":
+            return bool(regs[0])
+        return None
+
+    # ---------------------------
+    # Register cache (short-TTL snapshot of raw words)
+    # ---------------------------
+    def _cache_ttl_s(self) -> float:
+        """cache_ttl_ms if set, else the fastest running polling interval (0 = cache off)."""
+        if self.cache_ttl_ms is not None:
+            return max(0, self.cache_ttl_ms) / 1000.0
+        intervals = [pg.interval_ms for pg in list(self.polling_groups.values())
+                     if getattr(pg, "running", False)]
+        return min(intervals) / 1000.0 if intervals else 0.0
+
+    def _cache_store(self, table, start, values):
+        self._reg_cache.store(table, start, values, time.monotonic())
+        if table == "holding":
+            self._mw_shadow.store(start, values)
+
+    def _shadow_word(self, reg):
+        """
+        Current content of holding register reg for a read-modify-write:
+        the shadowed word if known (no Modbus traffic), else one read.
+        Not the MW wrapper's value: that may be a ':=' initial value the PLC never
+        held; the shadow only ever holds words read from / written to the PLC.
+        Returns None if the read fails.
+        """
+        if self.shadow_writes:
+            word_val = self._mw_shadow.get(reg)
+            if word_val is not None:
+                return word_val
+        with self._client_lock:
+            regs = self._extract_registers(self._req(self.client.read_holding_registers, reg, 1))
+        if not regs:
+            return None
+        self._mw_shadow.store(reg, regs[:1])
+        return regs[0]
+
+    def _cache_lookup(self, table, start, count, max_age_s):
+        """Cached raw values for the whole span if all are younger than max_age_s, else None."""
+        if max_age_s <= 0:
+            return None
+        return self._reg_cache.lookup(table, start, count, max_age_s, time.monotonic())
+
+    def _cache_invalidate(self, table, start, count=1):
+        self._reg_cache.invalidate(table, start, count)
+
+    # ---------------------------
+    # Write settle time (deadline per holding register)
+    # ---------------------------
+    def _settle_wait(self, start, count=1):
+        """Sleep until the settle time of the last write to start..start+count-1 is over."""
+        until = self._settle_until
+        if not until:
+            return
+        get = until.get
+        deadline = max(get(reg, 0.0) for reg in range(start, start + count))
+        wait = deadline - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
+    def _settle_mark(self, start, count=1):
+        """Start the settle time of written registers (no sleep here, see _settle_wait)."""
+        if self.write_settle_ms <= 0:
+            return
+        now = time.monotonic()
+        until = self._settle_until
+        if len(until) > 1024:
+            # drop expired deadlines so the dict stays small
+            for reg in [reg for reg, t in until.items() if t <= now]:
+                del until[reg]
+        deadline = now + self.write_settle_ms / 1000.0
+        for reg in range(start, start + count):
+            until[reg] = deadline
+
 
     def write_to_plc(self, base, num, value, bit=None):
         """
         Write to PLC depending on base type, with debug logging of results.
         - Uses _write_ok() to validate results across Modbus client versions
         - Marks connection dead on any hard failure
-        - Waits self.write_settle_ms after success to let PLC settle
+        - write_settle_ms: the written register gets a settle deadline; this call
+          first waits out the deadline of a previous write to the same register
+          (back-to-back writes to different registers don't wait)
         - Returns True on confirmed success, False otherwise
         """
         if not self.alive():  # Bail if PLC is not currently connected/alive
             return False
 
+        # whatever the outcome, cached words for this address are no longer trustworthy
+        try:
+            table, start, count = register_span(base, num)
+            self._cache_invalidate(table, start, count)
+            self._settle_wait(start, count)
+        except ValueError:
+            pass
+
         try:
             # --- MW (full 16-bit word) ---
             if base == "MW":
                 with self._client_lock:
-                    res_raw = self.client.write_single_register(num, int(value))
-                logging.debug(f"write_single_register({num}, {int(value)}) -> {res_raw}")
+                    res_raw = self._req(self.client.write_single_register, num, int(value))
+                log.debug("write_single_register(%s, %s) -> %s", num, value, res_raw)
                 if not self._write_ok(res_raw):
-                    self._set_dead(f"write MW{num} failed")
+                    self._request_failed(f"write MW{num} failed")
                     return False
-                time.sleep(self.write_settle_ms / 1000.0)
+                self._mw_shadow.store(num, [int(value) & 0xFFFF])
+                self._settle_mark(num)
                 return True
 
             # --- MB (single byte within a word) ---
             elif base == "MB":
                 parent = num // 2
-                with self._client_lock:
-                    regs_raw = self.client.read_holding_registers(parent, 1)
-                regs = self._extract_registers(regs_raw) or [0]
-                word_val = regs[0]
+                word_val = self._shadow_word(parent) or 0
                 # Modify only the targeted byte
                 if num % 2 == 0:   # Low byte
                     word_val = (word_val & 0xFF00) | (int(value) & 0xFF)
                 else:              # High byte
                     word_val = (word_val & 0x00FF) | ((int(value) & 0xFF) << 8)
                 with self._client_lock:
-                    res_raw = self.client.write_single_register(parent, word_val)
-                logging.debug(f"write_single_register({parent}, {word_val}) [MB] -> {res_raw}")
+                    res_raw = self._req(self.client.write_single_register, parent, word_val)
+                log.debug("write_single_register(%s, %s) [MB] -> %s", parent, word_val, res_raw)
                 if not self._write_ok(res_raw):
-                    self._set_dead(f"write MB{num} failed")
+                    self._request_failed(f"write MB{num} failed")
                     return False
-                time.sleep(self.write_settle_ms / 1000.0)
+                self._mw_shadow.store(parent, [word_val])
+                self._settle_mark(parent)
                 return True
 
             # --- MX (single bit within a byte) ---
             elif base == "MX":
                 parent = num // 2
-                with self._client_lock:
-                    regs_raw = self.client.read_holding_registers(parent, 1)
-                regs = self._extract_registers(regs_raw) or [0]
-                word_val = regs[0]
+                word_val = self._shadow_word(parent) or 0
                 byte_val = (word_val >> ((num % 2) * 8)) & 0xFF
                 if value:
                     byte_val |= (1 << bit)
@@ -883,30 +2122,30 @@ class ModbusWrapper:
                 else:              # High byte
                     word_val = (word_val & 0x00FF) | (byte_val << 8)
                 with self._client_lock:
-                    res_raw = self.client.write_single_register(parent, word_val)
-                logging.debug(f"write_single_register({parent}, {word_val}) [MX] -> {res_raw}")
+                    res_raw = self._req(self.client.write_single_register, parent, word_val)
+                log.debug("write_single_register(%s, %s) [MX] -> %s", parent, word_val, res_raw)
                 if not self._write_ok(res_raw):
-                    self._set_dead(f"write MX{num}.{bit} failed")
+                    self._request_failed(f"write MX{num}.{bit} failed")
                     return False
-                time.sleep(self.write_settle_ms / 1000.0)
+                self._mw_shadow.store(parent, [word_val])
+                self._settle_mark(parent)
                 return True
 
             # --- MD (full 32-bit double word) ---
             elif base == "MD":
-                lo = value & 0xFFFF
-                hi = (value >> 16) & 0xFFFF
-                regs = [hi, lo] if getattr(self, "md_big_endian", False) else [lo, hi]
+                regs = list(md_to_regs(value, self.md_big_endian))
                 with self._client_lock:
-                    res_raw = self.client.write_multiple_registers(num, regs)
-                logging.debug(f"write_multiple_registers({num}, {regs}) [MD] -> {res_raw}")
+                    res_raw = self._req(self.client.write_multiple_registers, num, regs)
+                log.debug("write_multiple_registers(%s, %s) [MD] -> %s", num, regs, res_raw)
                 if not self._write_ok(res_raw):
-                    self._set_dead(f"write MD{num} failed")
+                    self._request_failed(f"write MD{num} failed")
                     return False
-                time.sleep(self.write_settle_ms / 1000.0)
+                self._mw_shadow.store(num, regs)
+                self._settle_mark(num, 2)
                 return True
 
         except Exception as e:
-            logging.error(f"PLC write failed: {e}")
+            log.error("PLC write failed: %s", e)
             self._set_dead(f"exception in write {base}{num}")
             return False
         
@@ -914,12 +2153,35 @@ class ModbusWrapper:
     # ---------------------------
     # Read / Write API (unified)
     # ---------------------------
-    
-    def read_var(self, name):
+
+    def _lookup(self, name):
+        """
+        (wrapper, VarRec) for a variable name, or (None, None) if undefined.
+        The record is rebuilt lazily if missing or if the wrapper's address changed.
+        Raises ValueError if the address cannot be parsed.
+        """
+        # lock-free: single dict lookups are atomic, and variables/_vtbl are only
+        # ever replaced whole (copy-on-write, see instantiate_wrappers / build_address_registry)
+        obj = self.variables.get(name)
+        if obj is None:
+            return None, None
+        rec = self._vtbl.get(name)
+        if rec is None or rec.address != obj.address:
+            # no _vars_lock here either: make_var_rec() is pure and the store is one
+            # atomic dict assignment; two threads racing just compute the same record
+            # (a store into a _vtbl that was replaced meanwhile is only rebuilt again)
+            rec = make_var_rec(obj)
+            self._vtbl[name] = rec
+        return obj, rec
+
+    def read_var(self, name, max_age_ms=None):
         """
         Read a variable by name:
         - Looks up the wrapper object
-        - Reads from PLC if connected
+        - Serves it from the register cache if the words are younger than
+          max_age_ms (default: read_cache_ms[name], else cache_ttl_ms / fastest
+          polling interval)
+        - Otherwise reads from PLC if connected
         - Updates the wrapper's value via _set_value()
         - Leaves local value untouched if PLC read fails (returns None)
         - Optional: small pause after read if self.read_delay > 0
@@ -928,18 +2190,27 @@ class ModbusWrapper:
             raise ConnectionError("PLC offline (alive=False)")
 
         
-        with self._vars_lock:
-            obj = self.variables.get(name)  # Thread-safe lookup
+        obj, rec = self._lookup(name)       # Thread-safe lookup, address pre-parsed
         if obj is None:                     # Not defined → nothing to do
             return None
 
-        base, num, bit = parse_address(obj.address)    # Break down %MW / %MB / %MX / %MD
-        plc_val = self.read_from_plc(base, num, bit)   # Try to get live value from PLC
+        # 🔹 Fresh enough in the register cache (e.g. just fetched by polling)? no round-trip
+        if max_age_ms is None:
+            max_age_ms = self.read_cache_ms.get(name)
+        max_age_s = self._cache_ttl_s() if max_age_ms is None else max_age_ms / 1000.0
+        cached = self._cache_lookup(rec.table, rec.start, rec.count, max_age_s) if rec.table else None
+        if cached is not None:
+            self._set_value(obj, self._decode_rec(rec, cached))
+            self._sync_after_read(rec)
+            return obj.value
+
+        plc_val = self._read_rec(rec)                  # Try to get live value from PLC
 
         if plc_val is None:                            # Read failed
             return None                                # Caller sees None → can detect failure
 
         self._set_value(obj, plc_val)                  # Update wrapper & mark changed if needed
+        self._sync_after_read(rec)                     # aliases, as read_vars() does
 
         # 🔹 Optional read delay to reduce load when looping many reads
         try:
@@ -950,6 +2221,362 @@ class ModbusWrapper:
 
         return obj.value                               # Return the latest value in the wrapper
 
+    def read_vars(self, names, max_gap: Optional[int] = None, max_age_ms: float = 0):
+        """
+        Batched read of several variables by name:
+        - Maps each variable to the registers it lives in (register_span)
+        - Coalesces near-contiguous registers (gap <= max_gap, default read_max_gap) into runs,
+          capped at the Modbus limits (125 registers / 2000 inputs)
+        - Issues ONE read per run instead of one per variable
+          (with pipeline_depth > 1 the runs go out back to back, see _read_pipelined)
+        - Decodes locally and updates each wrapper via _set_value()
+          (plan + decoding are compiled once per name list, see _read_plan)
+        - MW words read are pushed once each to their MB/MX aliases
+        - max_age_ms > 0: runs whose registers are all in the register cache and
+          younger than that are decoded from the cache, without a request (polling
+          groups pass a share of their interval: see poll_reuse_ratio)
+        Returns {name: value}; value is None for unknown names or failed runs.
+        """
+        if not self.alive():
+            raise ConnectionError("PLC offline (alive=False)")
+
+        results = dict.fromkeys(names)
+        touched_mw = set()   # MW words read -> MB/MX aliases re-synced once each
+
+        jobs = self._read_plan(names, max_gap)
+        # one value generation per call, shared by all its runs (see _compile_apply)
+        prev = self._value_gen
+        g = self._value_gen = next(self._gen_counter)
+        prefetched = {}      # run index -> data already at hand (cache / pipelined burst)
+        if max_age_ms > 0:
+            # e.g. alarms also listed in a faster group: its words were read moments ago
+            max_age_s = max_age_ms / 1000.0
+            for i, (table, run_start, span, _) in enumerate(jobs):
+                hit = self._cache_lookup(table, run_start, span, max_age_s)
+                if hit is not None:
+                    prefetched[i] = hit
+        from_cache = set(prefetched)
+        todo = [i for i in range(len(jobs)) if i not in from_cache] if from_cache else range(len(jobs))
+
+        if self._settle_until:
+            # runs covering a register written less than write_settle_ms ago
+            for i in todo:
+                table, run_start, span, _ = jobs[i]
+                if table == "holding":
+                    self._settle_wait(run_start, span)
+        if self.pipeline_depth > 1 and len(todo) > 1 and not self.min_gap_ms:
+            # (a burst is back-to-back frames by design: with min_gap_ms the runs go
+            # one by one through _req(), which keeps the gap)
+            got = self._read_pipelined([jobs[i][:3] for i in todo])
+            self._pipeline_outcome(len(got) == len(todo))
+            for k, data in got.items():
+                prefetched[todo[k]] = data
+
+        for i, (table, run_start, span, apply) in enumerate(jobs):
+            if not self._alive_state:
+                break   # a previous run marked the PLC dead
+            data = prefetched.get(i)
+            if data is None:
+                try:
+                    with self._client_lock:
+                        if table == "holding":
+                            data = self._extract_registers(self._req(self.client.read_holding_registers, run_start, span))
+                        else:
+                            data = self._extract_bits(self._req(self.client.read_discrete_inputs, run_start, span))
+                except Exception as e:
+                    log.error("PLC batched read failed: %s", e)
+                    data = None
+            if not data or len(data) < span:
+                self._request_failed(f"batched read {table} {run_start}+{span} failed")
+                continue   # next run, unless that marked the PLC dead (checked above)
+            if i not in from_cache:
+                self._cache_store(table, run_start, data[:span])
+            apply(data, results, touched_mw, prev, g)
+
+        if touched_mw:
+            # one acquire per stripe per batch, not per word (a 125-register run touches
+            # up to 125 words but only 64 stripes); one stripe held at a time, so no
+            # lock-order issue with snapshot()
+            by_stripe = defaultdict(list)
+            for mw_num in touched_mw:
+                by_stripe[mw_num & 63].append(mw_num)
+            sync = self._sync_mw_to_mb_mx
+            for stripe, words in by_stripe.items():
+                with self._sync_stripes[stripe]:
+                    for mw_num in words:
+                        try:
+                            sync(mw_num)
+                        except Exception as e:
+                            log.error("sync after batched read failed: %s", e)
+
+        # 🔹 Optional read delay, once per batch instead of once per variable
+        try:
+            if getattr(self, "read_delay", 0):
+                time.sleep(self.read_delay)
+        except Exception:
+            pass
+
+        return results
+
+    def prime_shadow(self) -> int:
+        """
+        Read every holding-register variable (MW/MB/MX/MD) once, with read_vars():
+        - fills the register shadow, so the first MB/MX writes need no read first
+        - the wrappers get the PLC's values (also over := initial values not yet written)
+        - one request per run of up to 125 registers, not one per variable
+        Called by connect() when prime_on_connect is True. Returns the number of reads.
+        """
+        variables = self.variables   # published copy-on-write: safe to iterate
+        names, seen = [], set()
+        for name, obj in variables.items():
+            if id(obj) in seen:
+                continue   # alias of a variable already listed
+            seen.add(id(obj))
+            try:
+                _, rec = self._lookup(name)
+            except Exception:
+                continue
+            if rec is not None and rec.table == "holding":
+                names.append(name)
+        if not names:
+            return 0
+        runs = len(self._read_plan(names))
+        self.read_vars(names)
+        log.info("Shadow primed: %d variables in %d read(s)", len(names), runs)
+        return runs
+
+    def _read_plan(self, names, max_gap: Optional[int] = None):
+        """
+        _plan_batches() for a name list, with each run's decoding compiled into a
+        function (see _compile_apply). Cached per (names, max_gap): polling groups
+        read the same list every tick, so planning and codegen happen once.
+        Dropped when the registry is rebuilt (expansion, add_variable, reload).
+        Returns [(table, run_start, span, apply)].
+        """
+        if max_gap is None:
+            max_gap = self.read_max_gap
+        key = (tuple(names), max_gap)
+        hit = self._read_plans.get(key)
+        if hit is not None and hit[0] == self._layout_gen:
+            return hit[1]
+        gen = self._layout_gen
+        jobs = [(table, run_start, span, self._compile_apply(run_start, members))
+                for table, runs in self._plan_batches(names, max_gap).items()
+                for run_start, span, members in runs]
+        if len(self._read_plans) >= 64:
+            self._read_plans.clear()   # e.g. many ad-hoc name lists: don't grow forever
+        self._read_plans[key] = (gen, jobs)
+        return jobs
+
+    def _compile_apply(self, run_start, members):
+        """
+        Generate apply(d, results, touched, prev, g) for one read run: every member's
+        value is decoded from the run data d at a fixed offset and stored with
+        _store_value() (straight-line code, no per-variable lookups or decode dispatch).
+        - g: _value_gen of the calling read_vars(), prev: the one before it. The run data
+          of the last apply is kept with its g: if it is still prev (no wrapper value set
+          elsewhere, no other read_vars() since), no member's change stamp moved (set by
+          the application) and the PLC returned the same registers, the members already
+          hold these values -> only the results are filled, decoded from d, no wrapper is
+          touched (a changed md_big_endian also forces a full apply: MD values decode
+          differently)
+        - Same check per register when only part of the run changed: the members of an
+          unchanged register (up to 16 bits + 2 bytes of one word) are skipped as a block,
+          one int compare instead of a decode and a store each, unless one of them was
+          set locally since (change stamp above the record's): that group is stored again
+        - In a changed register, x = new ^ old tells which bits moved: a byte/bit member
+          is stored only if its mask hits x (one AND instead of a decode and a compare),
+          and without comparing again (its value is known to differ)
+        """
+        ns = {"_set": self._store_value, "mw": self, "_seq": next_seq, "st": [None]}
+        lines = ["def apply(d, results, touched, prev, g):",
+                 "    s = st[0]",
+                 "    p = s[0] if s is not None and s[1] == prev"
+                 " and s[2] == mw.md_big_endian else None"]
+        fast = []
+        tail = []
+        stamps = []     # every watched change stamp (members and the MB/MX aliases of MW members)
+        aliases = self._word_aliases
+        # members grouped by the register(s) they decode: one change test per group
+        groups = defaultdict(list)
+        for i, (start, count, name, rec, obj) in enumerate(members):
+            off = start - run_start
+            groups[(off, off + 1) if rec.base == "MD" else (off,)].append(i)
+
+        def store(i, expr, ind, known_changed):
+            # one member's store lines; known_changed: the XOR test already proved it differs
+            start, count, name, rec, obj = members[i]
+            if (rec.base, type(obj)) in _RAW_STORE:
+                # value already of the wrapper's type: the setter's change tracking
+                # inlined (no property call, no coercion), result without the getter
+                if known_changed:
+                    return [f"{ind}w{i}._gen = _seq()", f"{ind}w{i}._value = {expr}"]
+                # MX decodes to a comparison (always a bool singleton): identity test
+                cmp = "is not" if rec.base == "MX" else "!="
+                return [f"{ind}v = {expr}", f"{ind}if w{i}._value {cmp} v:",
+                        f"{ind}    w{i}._gen = _seq()", f"{ind}    w{i}._value = v"]
+            if type(obj) in _TRACKING_TYPES:
+                # wrapper type known at plan time: its own setter does the change tracking
+                return [f"{ind}w{i}.value = {expr}"]
+            return [f"{ind}_set(w{i}, {expr})"]
+
+        def decode(rec, off, src):
+            # (expression of the member's value, mask of its bits in the register or None)
+            if rec.base == "MW":
+                return src, None
+            if rec.base == "MB":
+                return f"({src} >> {rec.shift}) & 0xFF", 0xFF << rec.shift
+            if rec.base == "MX":
+                return f"({src} & {1 << rec.shift}) != 0", 1 << rec.shift
+            if rec.base == "MD":
+                # md_from_regs() inlined: no slice, no struct round trip per poll; the
+                # word order is still read per call (md_big_endian may change at runtime)
+                return (f"((d[{off}] << 16 | d[{off + 1}]) if mw.md_big_endian "
+                        f"else (d[{off}] | d[{off + 1}] << 16))"), None
+            return f"bool({src})", None
+
+        reset = {}      # parent word -> alias entry name, marked when its bytes/bits are set
+        full, delta = [], []   # bodies of the p is None / p known branches
+        for regs in sorted(groups):
+            idx = groups[regs]
+            marks = []  # touched / alias lines of this group
+            exprs = {}
+            # register decoded by several members (bytes/bits of one word): fetched
+            # from d once into a local, every member then only shifts/masks it
+            src = "r" if len(idx) > 1 and len(regs) == 1 else f"d[{regs[0]}]"
+            for i in idx:
+                start, count, name, rec, obj = members[i]
+                off = start - run_start
+                ns[f"w{i}"] = obj
+                exprs[i] = decode(rec, off, src)
+                raw = (rec.base, type(obj)) in _RAW_STORE
+                tail.append(f"    results[{name!r}] = w{i}._value" if raw
+                            else f"    results[{name!r}] = w{i}.value")
+                # unchanged run: the result is decoded from d (what the PLC holds), not
+                # taken from the wrapper; other wrapper types keep their setter's coercion
+                fast.append(f"        results[{name!r}] = {decode(rec, off, f'd[{off}]')[0]}" if raw
+                            else f"        results[{name!r}] = w{i}.value")
+                if rec.base == "MW":
+                    marks.append(f"touched.add({rec.num})")
+                elif (rec.base in ("MB", "MX") and aliases.get(rec.num >> 1)
+                        and (rec.num >> 1) not in reset):
+                    # byte/bit alias set straight from the PLC data: the word's
+                    # "last pushed" value no longer describes it (plan is rebuilt with the aliases)
+                    reset[rec.num >> 1] = f"e{i}"
+                    ns[f"e{i}"] = aliases[rec.num >> 1]
+                    marks.append(f"e{i}[6] = None")
+
+            if src == "r":
+                full.append(f"        r = d[{regs[0]}]")
+            full += [f"        {m}" for m in marks]
+            for i in idx:
+                full += store(i, exprs[i][0], "        ", False)
+
+            # a member set locally since the record (stamp above h) is stored again from d
+            # even if its register did not change on the PLC; so is a word whose MB/MX
+            # alias was set locally (touched -> the alias sync compares them again)
+            watched = [f"w{i}._gen" for i in idx]
+            for i in idx:
+                rec = members[i][3]
+                entry = aliases.get(rec.num) if rec.base == "MW" else None
+                if entry is not None:
+                    objs = [o for o in (entry[1], entry[2]) if o] + [o for _, o in entry[5]]
+                    for k, o in enumerate(objs):
+                        ns[f"a{i}_{k}"] = o
+                        watched.append(f"a{i}_{k}._gen")
+            stamps += watched
+            moved = " or ".join(f"{w} > h" for w in watched)
+            if len(regs) == 2:
+                # MD: two registers, compared as such
+                delta.append(f"        if d[{regs[0]}] != p[{regs[0]}] or d[{regs[1]}] != p[{regs[1]}]"
+                             f" or {moved}:")
+                delta += [f"            {m}" for m in marks]
+                for i in idx:
+                    delta += store(i, exprs[i][0], "            ", False)
+                continue
+            delta.append(f"        x = d[{regs[0]}] ^ p[{regs[0]}]")
+            delta.append(f"        if {moved}:")
+            if src == "r":
+                delta.append(f"            r = d[{regs[0]}]")
+            delta += [f"            {m}" for m in marks]
+            for i in idx:
+                delta += store(i, exprs[i][0], "            ", False)
+            delta.append("        elif x:")
+            if src == "r":
+                delta.append(f"            r = d[{regs[0]}]")
+            delta += [f"            {m}" for m in marks]
+            for i in idx:
+                expr, mask = exprs[i]
+                if mask is None:
+                    delta += store(i, expr, "            ", True)
+                else:
+                    delta.append(f"            if x & {mask}:")
+                    delta += store(i, expr, "                ", True)
+        # highest watched change stamp: a wrapper set by the application (obj.value = ...,
+        # on()/off()) moves it without touching _value_gen
+        top = f"max({', '.join(stamps)})" if len(stamps) > 1 else stamps[0]
+        fast[:0] = [f"    if p == d and {top} == s[3]:",
+                    "        s[1] = g   # still valid for the next read_vars()"]
+        body = ["    if p is None:"] + (full or ["        pass"]) + ["    else:", "        h = s[3]"] + delta
+        fast.append("        return")
+        # record after storing, only if no write/read_vars() started meanwhile (it bumped
+        # _value_gen); otherwise drop the record: the next read applies in full
+        lines += fast + body + tail
+        lines.append("    if mw._value_gen == g:")
+        lines.append(f"        st[0] = [list(d), g, mw.md_big_endian, {top}]")
+        lines.append("    else:")
+        lines.append("        st[0] = None")
+        exec(compile("\n".join(lines), "<read_vars plan>", "exec"), ns)
+        return ns["apply"]
+
+    def _plan_batches(self, names, max_gap: int = 8):
+        """
+        Plan the Modbus reads for a set of variable names:
+        - MB/MX map to their parent word, MD to 2 words, IX to the discrete table
+        - Sorted per table and greedily merged while the gap is <= max_gap and
+          the run stays within the Modbus limits (125 registers / 2000 inputs)
+        Returns {table: [(run_start, span, [(start, count, name, rec, obj)])]}.
+        Unknown or unmappable names are skipped.
+        """
+        wanted = {"holding": [], "discrete": []}   # table -> [(start, count, name, rec, obj)]
+
+        for name in names:
+            try:
+                obj, rec = self._lookup(name)
+            except Exception as e:
+                log.warning("read_vars: cannot map '%s': %s", name, e)
+                continue
+            if obj is None:
+                continue
+            if rec.table is None:
+                log.warning("read_vars: cannot map '%s' (%s): unsupported base %s", name, rec.address, rec.base)
+                continue
+            wanted[rec.table].append((rec.start, rec.count, name, rec, obj))
+
+        plan = {}
+        for table, items in wanted.items():
+            if not items:
+                continue
+            limit = MAX_READ_REGS if table == "holding" else MAX_READ_BITS
+            items.sort(key=lambda it: it[0])
+
+            # greedy merge into runs: [run_start, run_end(exclusive), [items]]
+            runs = []
+            for it in items:
+                start, count = it[0], it[1]
+                end = start + count
+                if runs:
+                    run = runs[-1]
+                    new_end = max(run[1], end)
+                    if start <= run[1] + max_gap and new_end - run[0] <= limit:
+                        run[1] = new_end
+                        run[2].append(it)
+                        continue
+                runs.append([start, end, [it]])
+
+            plan[table] = [(run_start, run_end - run_start, members) for run_start, run_end, members in runs]
+        return plan
+
     def write_var(self, name, value, force: bool = False):
         """
         Write to a variable:
@@ -960,46 +2587,84 @@ class ModbusWrapper:
         if not self.alive():
             raise ConnectionError("PLC offline (alive=False)")
         
-        with self._vars_lock:
-            obj = self.variables.get(name)             # Thread-safe lookup
-        if obj is None:
-            raise KeyError(f"Variable '{name}' not defined")  # Invalid variable name
-
-        # --- 1. Guard: read-only variable ---
-        if getattr(obj, "readonly", False) and not force:
-            logging.warning(f"Write blocked: variable '{name}' is read-only")
-            return False
-
-        # --- 2. Guard: has initial value (:=) and not forcing ---
-        if getattr(obj, "initial_value", None) is not None and not force:
-            logging.info(f"Skipping write for '{name}' (initial value present). Use force=True to override.")
-            return False
-
-        # --- 3. Parse Modbus address ---
+        # --- 0. Lookup wrapper + pre-parsed address record ---
         try:
-            base, num, bit = parse_address(obj.address)
+            obj, rec = self._lookup(name)              # Thread-safe lookup
         except Exception as e:
-            logging.error(f"Failed parsing address for {name}: {e}")
+            log.error("Failed parsing address for %s: %s", name, e)
             return False
+        if obj is None:
+            raise KeyError(f"Variable '{name}' not defined")  # Invalid variable name
 
-        # --- 4. Guard: IX discrete inputs are read-only ---
-        if base == "IX":
-            logging.warning(f"Write blocked: '{name}' is IX (discrete input) and read-only.")
+        # --- 1. Guards: read-only, initial value (:=), IX input (packed in rec.guard) ---
+        if rec.guard and self._write_blocked(name, rec, force):
             return False
 
-        # --- 5. Attempt PLC write ---
+        # --- 2. Modbus address (parsed once at load time) ---
+        base, num, bit = rec.base, rec.num, rec.bit
+
+        # --- 3. Attempt PLC write ---
         plc_ok = self.write_to_plc(base, num, value, bit)
 
         if not plc_ok:
             # PLC refused/failed the write — do not touch local value
-            logging.warning(f"PLC write failed for {name}")
+            log.warning("PLC write failed for %s", name)
             return False  # Will be refreshed by polling on next read
 
-        # --- 6. PLC write succeeded: update local object & mark changed ---
-        self._set_value(obj, value)
+        # --- 4. PLC write succeeded: update local object & mark changed,
+        # --- 5. then sync related addresses so aliases stay in sync (one stripe lock) ---
+        self._sync_after_write(base, num, bit, obj, value)
+
+        return True  # Success
+
+    def _write_blocked(self, name, rec, force):
+        """
+        Slow path of the write guards (only called when rec.guard != 0).
+        Logs why and returns True if the write must not happen.
+        """
+        guard = rec.guard
+        if guard & GUARD_READONLY and not force:
+            log.warning("Write blocked: variable '%s' is read-only", name)
+            return True
+        if guard & GUARD_INITIAL and not force:
+            log.info("Skipping write for '%s' (initial value present). Use force=True to override.", name)
+            return True
+        if guard & GUARD_INPUT:
+            log.warning("Write blocked: '%s' is IX (discrete input) and read-only.", name)
+            return True
+        return False
 
-        # --- 7. Sync related addresses so aliases stay in sync ---
-        with self._sync_lock:
+    def _sync_after_read(self, rec):
+        """
+        Alias handling of read_vars() for one variable read by read_var():
+        - MW: push the word to its MB/MX aliases (under the word's stripe)
+        - MB/MX: set straight from the PLC, so the word's "last pushed" value is stale
+        Dispatch on the pre-parsed record (no address parsing per read).
+        """
+        base = rec.base
+        if base == "MW":
+            with self._sync_stripes[rec.num & 63]:
+                try:
+                    self._sync_mw_to_mb_mx(rec.num)
+                except Exception as e:
+                    log.error("sync after read failed: %s", e)
+        elif base == "MB" or base == "MX":
+            aliases = self._word_aliases
+            word = rec.num >> 1
+            entry = aliases.get(word)
+            if entry is not None:
+                entry[6] = None
+
+    def _sync_after_write(self, base, num, bit, obj=None, value=None):
+        """
+        Propagate a confirmed write to the MW <-> MB <-> MX aliases (locks only the parent word's stripe).
+        obj/value: the written wrapper and its new value, stored under the same stripe
+        (the value and its aliases change together as seen by snapshot())
+        """
+        word = num if base in ("MW", "MD") else num // 2
+        with self._sync_stripes[word & 63]:
+            if obj is not None:
+                self._set_value(obj, value)
             try:
                 if base == "MW":
                     self._sync_mw_to_mb_mx(num)
@@ -1010,119 +2675,396 @@ class ModbusWrapper:
                 elif base == "MD":
                     pass  # TODO: advanced DWORD sync if needed
             except Exception as e:
-                logging.error(f"sync after write failed: {e}")
+                log.error("sync after write failed: %s", e)
 
-        return True  # Success
+    def write_vars(self, mapping, force: bool = False):
+        """
+        Batched write of several variables ({name: value}, or (name, value) pairs
+        as in a recipe download; a name given twice keeps its last value):
+        - Same guards as write_var (readonly, := initial value, IX read-only)
+        - MB/MX writes that share a parent word are merged into that word
+          (parent words from the register shadow, else one batched read;
+          no per-bit read-modify-write)
+        - Runs of consecutive holding registers go out as ONE
+          write_multiple_registers (FC16); isolated words use write_single_register
+        - Local values and aliases are updated only for confirmed runs,
+          with one alias fan-out per written word (see _sync_written)
+        - write_settle_ms as in write_to_plc: waits only for registers written
+          less than write_settle_ms ago, then marks the registers it wrote
+        Returns {name: True/False}.
+        """
+        if not self.alive():
+            raise ConnectionError("PLC offline (alive=False)")
+
+        if not isinstance(mapping, dict):
+            mapping = dict(mapping)   # pairs: one value per name (two writes to one register can't be merged)
+
+        results = {}
+        patches = {}     # register -> [mask, bits]
+        targets = []     # (name, obj, value, base, num, bit, [registers])
+
+        # per-variable loop: bound methods as locals (no attribute lookup per name)
+        lookup = self._lookup
+        new_patch = patches.setdefault
+        add_target = targets.append
+        md_big_endian = self.md_big_endian
+
+        for name, value in mapping.items():
+            results[name] = False
+            try:
+                obj, rec = lookup(name)
+            except Exception as e:
+                log.error("Failed parsing address for %s: %s", name, e)
+                continue
+            if obj is None:
+                raise KeyError(f"Variable '{name}' not defined")
+            if rec.guard and self._write_blocked(name, rec, force):
+                continue
+            base, num, bit = rec.base, rec.num, rec.bit
+
+            # express the write as (register, mask, bits) patches
+            if base == "MW":
+                regs = [(num, 0xFFFF, int(value) & 0xFFFF)]
+            elif base == "MB":
+                shift = (num % 2) * 8
+                regs = [(num // 2, 0xFF << shift, (int(value) & 0xFF) << shift)]
+            elif base == "MX":
+                shift = (num % 2) * 8 + bit
+                regs = [(num // 2, 1 << shift, (1 << shift) if value else 0)]
+            elif base == "MD":
+                first, second = md_to_regs(value, md_big_endian)
+                regs = [(num, 0xFFFF, first), (num + 1, 0xFFFF, second)]
+            else:
+                log.warning("write_vars: unsupported base %s for '%s'", base, name)
+                continue
+
+            for reg, mask, bits in regs:
+                patch = new_patch(reg, [0, 0])
+                patch[0] |= mask
+                patch[1] = (patch[1] & ~mask) | bits
+            add_target((name, obj, value, base, num, bit, [r[0] for r in regs]))
+
+        if not patches:
+            return results
+
+        # registers written less than write_settle_ms ago: wait out their deadline
+        # before reading/writing them again (nothing pending -> no loop at all)
+        if self._settle_until:
+            for reg in patches:
+                self._settle_wait(reg)
+
+        # current content of partially patched words: from the shadow if known,
+        # else fetched (one read per run)
+        current = {}
+        if self.shadow_writes:
+            for r, (mask, _) in patches.items():
+                word_val = self._mw_shadow.get(r) if mask != 0xFFFF else None
+                if word_val is not None:
+                    current[r] = word_val
+        partial = sorted(r for r, (mask, _) in patches.items() if mask != 0xFFFF and r not in current)
+        i = 0
+        while i < len(partial):
+            start = partial[i]
+            j = i
+            while j + 1 < len(partial) and partial[j + 1] - start < MAX_READ_REGS:
+                j += 1
+            span = partial[j] - start + 1
+            with self._client_lock:
+                regs_raw = self._req(self.client.read_holding_registers, start, span)
+            regs = self._extract_registers(regs_raw)
+            if not regs or len(regs) < span:
+                self._request_failed(f"write_vars pre-read {start}+{span} failed")
+                return results
+            for k, v in enumerate(regs):
+                current[start + k] = v
+            i = j + 1
+
+        words = {}
+        for reg, (mask, bits) in patches.items():
+            words[reg] = (current.get(reg, 0) & ~mask & 0xFFFF) | bits
+
+        # consecutive registers -> one FC16 each (max 123 registers per request)
+        ordered = sorted(words)
+        runs = []
+        i = 0
+        while i < len(ordered):
+            j = i
+            while j + 1 < len(ordered) and ordered[j + 1] == ordered[j] + 1 and j + 1 - i < 123:
+                j += 1
+            runs.append((ordered[i], [words[r] for r in ordered[i:j + 1]]))
+            i = j + 1
+
+        written = set()
+        if self.io_connections > 1 and len(runs) > 1:
+            # non-contiguous runs can't share one FC16: send them side by side
+            # over the extra connections (self.client covers any shortfall)
+            if self._io_pool is None:
+                self._io_pool = ThreadPoolExecutor(max_workers=self.io_connections,
+                                                   thread_name_prefix="modbus-io")
+            futures = [(start, values, self._io_pool.submit(self._write_run, start, values))
+                       for start, values in runs]
+            for start, values, fut in futures:
+                if fut.result():
+                    self._cache_store("holding", start, values)   # we know what the PLC holds now
+                    written.update(range(start, start + len(values)))
+                else:
+                    # already reported by _write_run (exception reply: link kept)
+                    self._cache_invalidate("holding", start, len(values))
+        else:
+            for start, values in runs:
+                ok = self._write_run(start, values)
+                if not ok:
+                    self._cache_invalidate("holding", start, len(values))
+                    if not self._alive_state:
+                        break   # link dropped: don't send the remaining runs
+                    continue
+                self._cache_store("holding", start, values)   # we know what the PLC holds now
+                written.update(range(start, start + len(values)))
+
+        done = []
+        for target in targets:
+            if not all(r in written for r in target[6]):
+                log.warning("PLC write failed for %s", target[0])
+                continue
+            done.append(target)
+            results[target[0]] = True
+        self._sync_written(done, words)
+
+        for start, values in runs:
+            if start in written:
+                self._settle_mark(start, len(values))
+        return results
+
+    def write_many(self, pairs, force: bool = False):
+        """write_vars() for an iterable of (name, value) pairs (or a dict)."""
+        return self.write_vars(pairs, force=force)
+
+    def _sync_written(self, done, words):
+        """
+        Store the confirmed values of a write_vars() batch and refresh the aliases:
+        ONE MW -> MB/MX fan-out per written word, whatever the number of variables
+        written into it (16 bits of a word: 1 sync, not 16).
+        - done: write_vars targets (name, obj, value, base, num, bit, regs) that were confirmed
+        - words: register -> full word value sent to the PLC
+        """
+        by_word = {}
+        for name, obj, value, base, num, bit, regs in done:
+            if base == "MD":
+                self._sync_after_write(base, num, bit, obj, value)
+                continue
+            word = num if base == "MW" else num >> 1
+            by_word.setdefault(word, []).append((obj, value, base, num, bit))
+
+        aliases = self._word_aliases
+        for word, items in by_word.items():
+            with self._sync_stripes[word & 63]:
+                try:
+                    for obj, value, base, num, bit in items:
+                        self._set_value(obj, value)
+                    entry = aliases.get(word)
+                    if entry is None:
+                        continue
+                    mw_obj = entry[0]
+                    if mw_obj is None:
+                        # no MW declared: the byte/bit syncs still keep MB <-> MX aligned
+                        for obj, value, base, num, bit in items:
+                            if base == "MX":
+                                self._sync_mx_to_mb_mw(num, bit)
+                            elif base == "MB":
+                                self._sync_mb_to_mw(num, entry)
+                        continue
+                    if any(base != "MW" for _, _, base, _, _ in items):
+                        entry[6] = None   # MB/MX set directly above: full fan-out
+                        self._set_value(mw_obj, words[word])   # merged word the PLC now holds
+                    self._sync_mw_to_mb_mx(word)
+                except Exception as e:
+                    log.error("sync after write failed: %s", e)
+
+    def snapshot(self, names):
+        """
+        Local values of several variables (no Modbus traffic) as one consistent view:
+        - holds the sync stripes of every MW/MB/MX word involved (acquired in index
+          order), so a word and its byte/bit aliases are never seen half-synced
+        - raises KeyError for undefined names
+        Returns {name: value}.
+        """
+        objs = []
+        stripes = set()
+        for name in names:
+            obj, rec = self._lookup(name)
+            if obj is None:
+                raise KeyError(f"Variable '{name}' not defined")
+            objs.append((name, obj))
+            if rec.base == "MW":
+                stripes.add(rec.num & 63)
+            elif rec.base in ("MB", "MX"):
+                stripes.add((rec.num >> 1) & 63)
+        locks = [self._sync_stripes[i] for i in sorted(stripes)]
+        for lock in locks:
+            lock.acquire()
+        try:
+            return {name: obj.value for name, obj in objs}
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def stage_var(self, name, value, force: bool = False) -> bool:
+        """
+        Queue a write without touching the PLC; flush() sends everything staged.
+        - Same guards as write_var, checked now (False if the write is blocked)
+        - MB/MX/MW writes into the same word are merged by write_vars() on flush:
+          e.g. LowByte + HighByte + a bit of Word2 -> 1 read + 1 write, not 3 RMW cycles
+        - Staging the same name twice keeps the last value
+        """
+        try:
+            obj, rec = self._lookup(name)
+        except Exception as e:
+            log.error("Failed parsing address for %s: %s", name, e)
+            return False
+        if obj is None:
+            raise KeyError(f"Variable '{name}' not defined")
+        if rec.guard and self._write_blocked(name, rec, force):
+            return False
+        with self._pending_lock:
+            self._pending.pop(name, None)   # re-insert: keep staging order for same-word patches
+            self._pending[name] = value
+        return True
+
+    def flush(self):
+        """
+        Send all staged writes as one write_vars() batch.
+        Returns {name: True/False}; names that failed stay staged for the next flush().
+        """
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return {}
+        try:
+            results = self.write_vars(pending, force=True)   # guards already applied in stage_var()
+        except ConnectionError:
+            results = {name: False for name in pending}
+        with self._pending_lock:
+            for name, ok in results.items():
+                if not ok and name not in self._pending:
+                    self._pending[name] = pending[name]
+        return results
 
     # ---------------------------
     # Synchronization helpers
     # ---------------------------
-    def _get_registry_obj(self, key: str):
-        """Thread-safe return of registry object or None."""
-        with self._vars_lock:
-            return self.registry.get(key)
+    def _get_registry_obj(self, key: int):
+        """Registry object or None (lock-free, like _lookup)."""
+        return self.registry.get(key)
 
 
     def _sync_mw_to_mb_mx(self, mw_num: int):
         """
         When MWn changes, update MB(2n), MB(2n+1) and corresponding MX bits.
         """
-        # canonical MW key
-        mw_key = canonical_key("MW", mw_num, None)
-        mw_obj = self._get_registry_obj(mw_key)
-
-        if mw_obj is None:
+        aliases = self._word_aliases
+        entry = aliases.get(mw_num)
+        if entry is None or entry[0] is None:
             return
+        mw_obj, mb_low_obj, mb_high_obj = entry[0], entry[1], entry[2]
 
         # use 0 if None
         try:
-            word_val = int(getattr(mw_obj, "value", 0) or 0)
+            word_val = int(mw_obj.value or 0)
         except Exception:
             word_val = 0
 
-        low = word_val & 0xFF
-        high = (word_val >> 8) & 0xFF
-
-        mb_low_idx = 2 * mw_num
-        mb_high_idx = mb_low_idx + 1
-
-        # update MB low
-        mb_low_key = canonical_key("MB", mb_low_idx, None)
-        mb_high_key = canonical_key("MB", mb_high_idx, None)
-
-        mb_low_obj = self._get_registry_obj(mb_low_key)
-        if mb_low_obj:
-            mb_low_obj.value = low
-
-        mb_high_obj = self._get_registry_obj(mb_high_key)
-        if mb_high_obj:
-            mb_high_obj.value = high
-
-        # update MX bits for low byte
-        if mb_low_obj:
-            for bit in range(8):
-                mx_key = canonical_key("MX", mb_low_idx, bit)
-                mx_obj = self._get_registry_obj(mx_key)
-                if mx_obj:
-                    bit_val = bool((low >> bit) & 1)
-                    mx_obj.value = bit_val
-
-        # update MX bits for high byte
-        if mb_high_obj:
-            for bit in range(8):
-                mx_key = canonical_key("MX", mb_high_idx, bit)
-                mx_obj = self._get_registry_obj(mx_key)
-                if mx_obj:
-                    bit_val = bool((high >> bit) & 1)
-                    mx_obj.value = bit_val
-
-    def _sync_mb_to_mw(self, mb_num: int):
-        """
-        When MB changes, recompute its sibling MB and update the parent MW value.
+        # only the bits that differ from the word last pushed to the aliases
+        # (steady-state polling of a quiet word: nothing to do, unless an alias was
+        # set locally since that push: then every alias is compared again)
+        prev = entry[6]
+        if prev == word_val:
+            top = entry[7]
+            if ((not mb_low_obj or mb_low_obj._gen <= top)
+                    and (not mb_high_obj or mb_high_obj._gen <= top)):
+                for mask, mx_obj in entry[5]:
+                    if mx_obj._gen > top:
+                        break
+                else:
+                    return
+            prev = None
+        diff = 0xFFFF if prev is None else prev ^ word_val
+        entry[6] = word_val
+
+        # values below are already masked ints / bools: _set_raw skips the setters' coercion
+        if mb_low_obj and diff & 0xFF:
+            mb_low_obj._set_raw(word_val & 0xFF)
+        if mb_high_obj and diff & 0xFF00:
+            mb_high_obj._set_raw((word_val >> 8) & 0xFF)
+
+        # update the declared MX bits only (no 2 x 8 scan of empty slots);
+        # precomputed masks: one AND + compare per bit, no shifts
+        for mask, mx_obj in entry[5]:
+            if diff & mask:
+                mx_obj._set_raw((word_val & mask) != 0)
+        entry[7] = next_seq()   # above every stamp of this push
+
+    def _sync_mb_to_mw(self, mb_num: int, entry=None):
+        """
+        When MB changes, patch its byte into the parent MW value (the other byte is kept,
+        even if its MB is not declared) and push the byte to its 8 MX bits.
         MB index -> parent MW = MB_index // 2
+        entry: the word's _word_aliases entry if the caller already has it
         """
-        parent_mw = mb_num // 2
-        mb_low_idx = 2 * parent_mw
-        mb_high_idx = mb_low_idx + 1
-
-        mb_low_key = canonical_key("MB", mb_low_idx, None)
-        mb_high_key = canonical_key("MB", mb_high_idx, None)
-        mw_key = canonical_key("MW", parent_mw, None)
-
-        low_obj = self._get_registry_obj(mb_low_key)
-        high_obj = self._get_registry_obj(mb_high_key)
-        low_val = int(getattr(low_obj, "value", 0) or 0) if low_obj else 0
-        high_val = int(getattr(high_obj, "value", 0) or 0) if high_obj else 0
-
-        new_word = (high_val << 8) | (low_val & 0xFF)
+        if entry is None:
+            aliases = self._word_aliases
+            entry = aliases.get(mb_num >> 1)
+        if entry is None:
+            return
+        mw_obj, mb_obj = entry[0], entry[1 + (mb_num & 1)]
+        if not mb_obj:
+            return
 
-        mw_obj = self._get_registry_obj(mw_key)
-        if mw_obj:
-            mw_obj.value = new_word
+        entry[6] = None   # aliases changed outside _sync_mw_to_mb_mx: next MW sync is a full one
+        byte_val = int(mb_obj.value or 0) & 0xFF
+        # byte -> bits: one table lookup, then only the declared MX slots
+        for mx_obj, on in zip(entry[3 + (mb_num & 1)], _BYTE_TO_BITS[byte_val]):
+            if mx_obj is not None and mx_obj.value != on:
+                mx_obj._set_raw(on)
+        if mw_obj is None:
+            return
+        shift = (mb_num & 1) * 8
+        old = int(mw_obj.value or 0)
+        word_val = (old & ~(0xFF << shift) & 0xFFFF) | (byte_val << shift)
+        if word_val != old:
+            mw_obj._set_raw(word_val)
 
     def _sync_mx_to_mb_mw(self, mb_num: int, bit: int):
         """
-        When MX (bit) changes, update the MB byte bit and then parent MW.
+        When MX (bit) changes, set/clear that one bit in the MB byte and then the parent MW
+        (a single mask operation each; the other bits are kept).
         MX key uses MB index and bit.
         """
-        mb_key = canonical_key("MB", mb_num, None)
-        mb_obj = self._get_registry_obj(mb_key)
-        if not mb_obj:
-            # nothing to do
+        aliases = self._word_aliases
+        entry = aliases.get(mb_num >> 1)
+        if entry is None:
             return
+        mx_obj = entry[3 + (mb_num & 1)][bit]
+        if mx_obj is None:
+            return
+        entry[6] = None   # aliases changed outside _sync_mw_to_mb_mx: next MW sync is a full one
+        on = bool(mx_obj.value)
+
+        # only this one bit changed: patch it into MB and MW directly, no byte -> 8 bits
+        # fan-out through _sync_mb_to_mw (the other MX of the row are already right)
+        mb_obj = entry[1 + (mb_num & 1)]
+        if mb_obj:
+            old = int(mb_obj.value or 0)
+            byte_val = (old & ~(1 << bit) & 0xFF) | (on << bit)
+            if byte_val != old:
+                mb_obj._set_raw(byte_val)
+        mw_obj = entry[0]
+        if mw_obj is not None:
+            shift = (mb_num & 1) * 8 + bit
+            old = int(mw_obj.value or 0)
+            word_val = (old & ~(1 << shift) & 0xFFFF) | (on << shift)
+            if word_val != old:
+                mw_obj._set_raw(word_val)
 
-        # recompute mb byte from all MX bits we know
-        byte_val = 0
-        for b in range(8):
-            mx_key = canonical_key("MX", mb_num, b)
-            mx_obj = self._get_registry_obj(mx_key)
-            bitv = 1 if (mx_obj and getattr(mx_obj, "value", False)) else 0
-            byte_val |= (bitv << b)
-
-        mb_obj.value = byte_val
-        # now push to MW
-        self._sync_mb_to_mw(mb_num)
-        
 
     def add_variable(self, name, address, dtype,
                     description: str = "", initial_value=None, readonly: bool = None):
@@ -1149,20 +3091,31 @@ class ModbusWrapper:
             self.instantiate_wrappers(parsed_like, replace=False)
             self.build_address_registry()
 
-        logging.info(f"On-the-fly variable added: {name} -> {address} ({dtype})")        
+        log.info("On-the-fly variable added: %s -> %s (%s)", name, address, dtype)        
 
 
-    def _read_with_retries(self, name: str, retries: int = 0):
+    def _read_with_retries(self, name: str, retries: int = 0, max_total_s: Optional[float] = None):
         """
         Try reading a variable up to 'retries'+1 times.
+        - Backoff between attempts: 20 ms, 40 ms, ... capped at 100 ms (none after the last)
+        - Gives up early once the PLC is marked dead (retrying can't succeed)
+        - max_total_s: time budget for all attempts (pollers pass their share of the
+          interval, so one flaky variable can't stretch the whole cycle)
         Returns value or None if all tries fail.
         """
         tries = max(0, int(retries)) + 1
+        deadline = None if max_total_s is None else time.monotonic() + max_total_s
+        delay = 0.02
         for i in range(tries):
             val = self.read_var(name)
             if val is not None:
                 return val
-            time.sleep(0.1)  # small spacing between attempts
+            if i + 1 == tries or not self._alive_state:
+                break
+            if deadline is not None and time.monotonic() + delay > deadline:
+                break
+            time.sleep(delay)  # small spacing between attempts
+            delay = min(delay * 2, 0.1)
         return None
     
     
@@ -1171,35 +3124,108 @@ class ModbusWrapper:
     # ---------------------------
     def load_variables_from_file(self, filepath: str):
         """Reload variables and rebuild registry (dynamic reload)."""
-        parsed = self.parse_variables_file(filepath)
+        parsed = self.load_parsed_variables(filepath)
         self.instantiate_wrappers(parsed)
         self.build_address_registry()
-        logging.info("Variables reloaded from file.")
+        log.info("Variables reloaded from file.")
 
 
     # ---------------------------
     # Polling group manager
     # ---------------------------
     
-    def add_polling_group(self, group_name, var_names, interval_ms=1000, max_cycles=0, per_read_retries=0):
-        # Stop existing group if present
-        if group_name in self.polling_groups:
-            try:
-                self.polling_groups[group_name].stop()
-            except Exception:
-                pass
+    def add_polling_group(self, group_name, var_names, interval_ms=1000, max_cycles=0, per_read_retries=0,
+                          align: bool = False, phase_offset_ms=None):
+        """
+        Create (and for max_cycles=0 start) a polling group.
+        - phase_offset_ms: delay of the first tick inside the interval window.
+          None = automatic: groups with the same interval_ms (not aligned) get spread
+          over the window, so they don't all hit the PLC at the same instant.
+          Aligned groups (align=True, watch()) keep offset 0: they are meant to fall
+          due together and be merged into one read.
+        """
+        with self._groups_lock:
+            # Same name + same configuration -> idempotent: return the existing group
+            # (re-running setup code must not stack duplicate pollers)
+            existing = self.polling_groups.get(group_name)
+            if existing is not None and (
+                existing.var_names == tuple(var_names)
+                and existing.interval_ms == int(interval_ms)
+                and existing.max_cycles == int(max_cycles)
+                and existing.per_read_retries == int(per_read_retries)
+                and existing.align == bool(align)
+                and (phase_offset_ms is None or existing.phase_offset_ms == float(phase_offset_ms))
+            ):
+                if max_cycles == 0 and not existing.running:
+                    existing.start()
+                return existing
+
+            # Different configuration: stop the existing group and replace it
+            # (bounded wait for its in-flight tick, see Poller.stop)
+            if existing is not None:
+                try:
+                    existing.stop()
+                except Exception:
+                    pass
 
-        pg = Poller(self, var_names, interval_ms=interval_ms, unit_id=self.client.unit_id,
-                    max_cycles=max_cycles, per_read_retries=per_read_retries)
-        self.polling_groups[group_name] = pg
+            if phase_offset_ms is None:
+                phase_offset_ms = self._auto_phase_offset(group_name, int(interval_ms)) if not align else 0
 
-        # Auto-start only for infinite (Graziano's rule): 0 means auto-start
-        if max_cycles == 0:
-            pg.start()
+            pg = Poller(self, var_names, interval_ms=interval_ms, unit_id=self.client.unit_id,
+                        max_cycles=max_cycles, per_read_retries=per_read_retries, align=align,
+                        phase_offset_ms=phase_offset_ms)
+            self.polling_groups[group_name] = pg
 
-        logging.info(
-            f"Polling group '{group_name}' created with {len(var_names)} vars "
-            f"(interval={interval_ms} ms, max_cycles={max_cycles}, retries={per_read_retries})"
-        )
-        return pg
+            # plan the group's batched reads now (register runs + compiled decoding, see
+            # _read_plan): the first tick then goes straight to the Modbus requests
+            self._read_plan(pg.var_names)
+
+            # Auto-start only for infinite (Graziano's rule): 0 means auto-start
+            if max_cycles == 0:
+                pg.start()
+
+            log.info(
+                "Polling group '%s' created with %d vars "
+                "(interval=%s ms, offset=%g ms, max_cycles=%s, retries=%s)",
+                group_name, len(var_names), interval_ms, pg.phase_offset_ms, max_cycles, per_read_retries
+            )
+            return pg
+
+    def _auto_phase_offset(self, group_name, interval_ms):
+        """
+        Offset for the next non-aligned group with this interval.
+        - slot k = number of such groups already present
+        - offset = frac(k * 0.618) * interval (golden-ratio spacing): every new group
+          lands in the largest free gap, without moving the groups already running
+        """
+        slot = sum(1 for name, pg in self.polling_groups.items()
+                   if name != group_name and not pg.align and pg.interval_ms == interval_ms)
+        return round((slot * 0.6180339887) % 1.0 * interval_ms)
     
+
+    def stop_polling_group(self, group_name):
+        """Stop a polling group (cancels its scheduler entry) and forget it."""
+        with self._groups_lock:
+            pg = self.polling_groups.pop(group_name, None)
+            if pg is None:
+                return False
+            try:
+                pg.stop()   # bounded wait for an in-flight tick before the name can be reused
+            except Exception as e:
+                log.error("stop_polling_group(%s) failed: %s", group_name, e)
+        return True
+
+    def watch(self, var_name, poll_ms=1000, per_read_retries=0):
+        """
+        Poll ONE variable at its own rate (e.g. a fast counter at 200 ms, a setpoint at 5 s).
+        - Each watch is a one-variable Poller (group name 'watch:<var>') on the shared scheduler
+        - Deadlines are aligned to multiples of poll_ms, so watches with related rates
+          fall due together and the scheduler merges them into one read_vars()
+        Calling it again for the same variable replaces the previous rate.
+        """
+        return self.add_polling_group(f"watch:{var_name}", [var_name], interval_ms=poll_ms,
+                                      per_read_retries=per_read_retries, align=True)
+
+    def unwatch(self, var_name):
+        """Stop a watch() started for var_name."""
+        return self.stop_polling_group(f"watch:{var_name}")
@@ -1,4 +1,5 @@
 # polling/__init__.py
 from .poller import Poller
+from .scheduler import PollScheduler, default_scheduler
 
-__all__ = ["Poller"]
+__all__ = ["Poller", "PollScheduler", "default_scheduler"]
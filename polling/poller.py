@@ -2,25 +2,84 @@
 import threading
 import time
 import logging
-from typing import List
+from typing import List, Optional
+
+from wrappers import KIND_DWORD
+from .scheduler import PollScheduler, default_scheduler
+
+log = logging.getLogger(__name__)
+
+# Modbus limits per request: registers (FC3) / bits (FC1, FC2)
+MAX_READ = {"holding": 125, "coils": 2000, "discrete": 2000}
+
+# area -> (table, num divisor, register/bit count); same table/registers as the batched
+# reads (ext_modbus_blueprint.register_span): MB/MX live in their parent holding
+# word (num // 2), MD in 2 registers from num; unknown areas read as one holding word
+_MODBUS_MAP = {
+    "MW": ("holding", 1, 1),
+    "MB": ("holding", 2, 1),
+    "MX": ("holding", 2, 1),
+    "MD": ("holding", 1, 2),
+    "IX": ("discrete", 1, 1),
+    "QX": ("coils", 1, 1),
+}
+_MODBUS_DEFAULT = ("holding", 1, 1)
+
+# consecutive failed cycles of the same read before it is logged as a warning
+# (earlier failures: DEBUG only, no traceback formatted at the default levels)
+FAIL_WARN_AFTER = 3
+
+# shift of an MB byte inside its parent word, indexed by num & 1 (even = low byte)
+_BYTE_SHIFT = (0, 8)
 
 # Helper stubs you must implement or import (if not already present)
-def parse_address(addr):  # reuse your existing parse_address
-    from ext_modbus_blueprint import parse_address as p
-    return p(addr)
+_parse_address = None
+
+def parse_address(addr):  # reuse your existing parse_address (memoized there)
+    # imported on first use (ext_modbus_blueprint imports this module), then kept:
+    # no import statement executed per call
+    global _parse_address
+    if _parse_address is None:
+        from ext_modbus_blueprint import parse_address as p
+        _parse_address = p
+    return _parse_address(addr)
 
 def wrapper_addr_parse(addr):
     return parse_address(addr)
 
-def convert_regs_to_value(wrapper, regs):
-    cls = wrapper.__class__.__name__
-    if cls == "Word":
-        return int(regs[0])
-    if cls == "DWord":
-        return (int(regs[0]) << 16) | int(regs[1])
-    return int(regs[0])
+def convert_regs_to_value(wrapper, regs, parsed=None, big_endian=True):
+    # dispatch on the int type code, not on the class name string
+    # parsed: (base, num, bit) if the caller already has it (no parse per call)
+    # big_endian: MD word order (True = high word first; pass mw.md_big_endian)
+    return regs_decoder(wrapper, parsed)(regs, 0, big_endian)
+
+def regs_decoder(wrapper, parsed=None):
+    """
+    (regs, offset, big_endian) -> value for one wrapper, specialized once (plan time):
+    type code and address are resolved here, the returned function only does the
+    shift/mask on the register at regs[offset] (no slice, no int() of client ints).
+    """
+    if getattr(wrapper, "KIND", None) == KIND_DWORD:
+        def decode(d, o, big_endian):
+            if big_endian:
+                return d[o] << 16 | d[o + 1]
+            return d[o + 1] << 16 | d[o]
+        return decode
+    base, num, bit = parsed or wrapper_addr_parse(wrapper.address)
+    if base == "MB":
+        shift = _BYTE_SHIFT[num & 1]
+        return lambda d, o, big_endian: (d[o] >> shift) & 0xFF
+    if base == "MX":
+        shift = _BYTE_SHIFT[num & 1] + (bit or 0)
+        return lambda d, o, big_endian: bool((d[o] >> shift) & 1)
+    return lambda d, o, big_endian: d[o]
 
 class Poller:
+    # fixed field set, like the wrappers (no per-instance __dict__)
+    __slots__ = ("mw", "var_names", "interval_ms", "unit_id", "max_cycles", "per_read_retries",
+                 "_stop", "_lock", "_idle", "_cycles", "_scheduler", "align", "phase_offset_ms",
+                 "_io_map", "_plan", "_offline", "_fails")
+
     def __init__(
         self,
         mw,
@@ -29,121 +88,306 @@ class Poller:
         unit_id: int = 1,
         max_cycles: int = 0,
         per_read_retries: int = 0,
+        scheduler: Optional[PollScheduler] = None,
+        align: bool = False,
+        phase_offset_ms: float = 0,
     ):
         """
         mw: ModbusWrapper instance
-        var_names: list of variable NAMES (as in variables.txt)
+        var_names: list of variable NAMES (as in variables.txt); kept as a tuple, which
+                   is also the key of the wrapper's cached read plan (no copy per tick)
         interval_ms: polling period in milliseconds
         unit_id: Modbus unit/slave id (if needed)
         max_cycles: 0 = run forever; >0 run that many cycles then stop
         per_read_retries: pass-through retry count for each read (optional)
+        scheduler: PollScheduler driving tick(); defaults to the shared one
+                   (one thread for all groups instead of one thread per group)
+        align: first tick on a multiple of interval_ms (monotonic clock), so pollers
+               with related intervals fall due together and get merged by the scheduler
+        phase_offset_ms: extra delay of the first tick; the scheduler keeps the phase, so
+                         groups with different offsets stay spread over the interval
         """
         self.mw = mw
-        self.var_names = var_names[:]
+        self.var_names = tuple(var_names)
         self.interval_ms = int(interval_ms)
         self.unit_id = unit_id
         self.max_cycles = int(max_cycles)
         self.per_read_retries = int(per_read_retries)
         self._stop = threading.Event()
-        self._thread = None
         self._lock = threading.Lock()
+        self._idle = threading.Event()   # set while no tick is in flight
+        self._idle.set()
+        self._cycles = 0
+        self._scheduler = scheduler or default_scheduler()
+        self.align = bool(align)
+        self.phase_offset_ms = float(phase_offset_ms)
+        self._io_map = {}   # name -> (wrapper, (func, addr, count), parsed address), see _poll_each
+        self._plan = None   # (wrappers, gap, blocks) of the last _plan_reads(), see _poll_grouped
+        self._offline = 0   # cycles skipped in the current PLC outage (0 = online)
+        self._fails = {}    # read key (name or block) -> consecutive failed cycles, see _read_failed
 
     def start(self):
-        if self._thread and self._thread.is_alive():
+        if self._scheduler.is_scheduled(self):
             return
         self._stop.clear()
-        self._thread = threading.Thread(target=self._run, daemon=True)
-        self._thread.start()
-        logging.info(f"Poller started for {self.var_names} @ {self.interval_ms}ms")
+        self._cycles = 0
+        first_delay = 0.0
+        if self.align and self.interval_ms > 0:
+            period = self.interval_ms / 1000.0
+            first_delay = (-time.monotonic()) % period
+        first_delay += self.phase_offset_ms / 1000.0
+        self._scheduler.add(self, first_delay_s=first_delay)
+        log.info("Poller started for %s @ %sms", self.var_names, self.interval_ms)
 
-    def stop(self):
+    def stop(self, timeout: float = None) -> bool:
+        """
+        Cancel the poller and wait (bounded) for an in-flight tick to finish.
+        timeout: seconds to wait; default = one request timeout of the wrapper
+                 plus one interval, at least 1 s
+        Returns True if no tick is running any more (safe to replace the group).
+        """
         self._stop.set()
-        if self._thread:
-            # join but don't block forever
-            self._thread.join(timeout=1.0)
-        logging.info("Poller stopped")
-        
-
-    def _map_to_modbus(self, wrapper):
-        # same mapping you had — keep unchanged
-        addr = wrapper.address
-        base, num, bit = wrapper_addr_parse(addr)
-        if base == "MW":
-            return ("holding", num, 1)
-        if base == "MB":
-            return ("holding", num // 2, 1)
-        if base in ("IX",):
-            return ("discrete", num, 1)
-        if base in ("MX", "QX"):
-            return ("coils", num, 1)
-        if base == "MD":
-            return ("holding", num * 2, 2)
-        return ("holding", num, 1)
-
-    def _run(self):
-        logging.info(
-            f"Poller loop started for {self.var_names} (interval={self.interval_ms}ms, max_cycles={self.max_cycles}, retries={self.per_read_retries})"
-        )
-        
-        cycles = 0
-        while not self._stop.is_set():
-            if self.max_cycles > 0 and cycles >= self.max_cycles:
-                break
-            start = time.time()
-
-            
-            if not self.mw.alive():
-                logging.warning("Poller: PLC not alive, skipping cycle")
-                if self._stop.wait(self.interval_ms / 1000.0):
-                    break
-                continue
+        self._scheduler.remove(self)
+        if timeout is None:
+            timeout = max(1.0, float(getattr(self.mw, "timeout", 0) or 0) + self.interval_ms / 1000.0)
+        # wait for an in-flight tick, but don't block forever
+        idle = self._idle.wait(timeout=timeout)
+        if idle:
+            log.info("Poller stopped")
+        else:
+            log.warning("Poller for %s: tick still running after %.1fs, "
+                        "it will end on its own (no further ticks are scheduled)", self.var_names, timeout)
+        return idle
 
-            
+    @property
+    def running(self) -> bool:
+        return self._scheduler.is_scheduled(self)
 
-            for name in self.var_names:
-                with self._lock:
-                    wrapper = self.mw.variables.get(name)
-                if not wrapper:
-                    logging.debug(f"Poller: variable {name} not found, skipping")
-                    continue
+    def try_begin_tick(self) -> bool:
+        """Called by the scheduler; False if the previous tick is still running."""
+        with self._lock:
+            if not self._idle.is_set():
+                return False
+            self._idle.clear()
+            return True
 
-                # Option A: use ModbusWrapper's read retries (preferred, consistent)
+    def end_tick(self):
+        self._idle.set()
+
+    def _resolve(self, name, wrapper):
+        """
+        (func, addr, count) + parsed address of a wrapper, resolved once per wrapper
+        object (rebuilt only if the name now points to another wrapper).
+        """
+        hit = self._io_map.get(name)
+        if hit is None or hit[0] is not wrapper:
+            parsed = wrapper_addr_parse(wrapper.address)
+            hit = self._io_map[name] = (wrapper, self._map_to_modbus(wrapper, parsed), parsed)
+        return hit[1], hit[2]
+
+    def _map_to_modbus(self, wrapper, parsed=None):
+        # one table lookup per area (see _MODBUS_MAP); parsed: (base, num, bit) if known
+        base, num, bit = parsed or wrapper_addr_parse(wrapper.address)
+        table, div, count = _MODBUS_MAP.get(base, _MODBUS_DEFAULT)
+        return (table, num // div, count)
+
+    def tick(self) -> bool:
+        """
+        Run ONE polling cycle (called from the scheduler's worker pool).
+        Returns False once the poller is finished (stopped or max_cycles reached).
+        """
+        state = self.begin_cycle()
+        if state is not None:
+            return state
+
+        # Preferred: one batched request per contiguous register run
+        if hasattr(self.mw, "read_vars"):
+            self._poll_batched()
+        else:
+            self._poll_each()
+
+        return self.finish_cycle()
+
+    def begin_cycle(self):
+        """
+        Pre-cycle checks, split out so the scheduler can merge the reads of
+        several groups that fall due together (see PollScheduler).
+        Returns None if the cycle should run, else tick()'s return value.
+        """
+        if self._stop.is_set():
+            return False
+        if self.max_cycles > 0 and self._cycles >= self.max_cycles:
+            log.info("Poller loop finished (cycles=%s)", self._cycles)
+            return False
+
+        if not self.mw.alive():
+            # skipping costs nothing (no I/O; reconnecting is keep_connected()'s job):
+            # warn once per outage instead of once per tick
+            self._offline += 1
+            if self._offline == 1:
+                log.warning("Poller %s: PLC not alive, skipping cycles until it is back", self.var_names)
+            return True
+        if self._offline:
+            log.info("Poller %s: PLC back after %d skipped cycle(s)", self.var_names, self._offline)
+            self._offline = 0
+        return None
+
+    def finish_cycle(self) -> bool:
+        """Count the cycle; False once max_cycles is reached."""
+        self._cycles += 1
+        if self.max_cycles > 0 and self._cycles >= self.max_cycles:
+            log.info("Poller loop finished (cycles=%s)", self._cycles)
+            return False
+        return True
+
+    def _retry_budget_s(self) -> float:
+        """Retry time per variable: its share of one interval (the cycle stays within it)."""
+        return self.interval_ms / 1000.0 / max(1, len(self.var_names))
+
+    def reuse_age_ms(self) -> float:
+        """Register-cache age this group accepts instead of a new read (mw.poll_reuse_ratio)."""
+        return self.interval_ms * getattr(self.mw, "poll_reuse_ratio", 0)
+
+    def _read_failed(self, key, e):
+        """
+        Log a failed read without a traceback per cycle: DEBUG (with traceback, only if
+        enabled) until the same read failed FAIL_WARN_AFTER cycles in a row, then one
+        warning; nothing more until it succeeds again (see _read_ok).
+        """
+        n = self._fails[key] = self._fails.get(key, 0) + 1
+        if n == FAIL_WARN_AFTER:
+            log.warning("Poll read error for %s (%d cycles in a row): %s", key, n, e)
+        elif n < FAIL_WARN_AFTER and log.isEnabledFor(logging.DEBUG):
+            log.debug("Poll read error for %s: %s", key, e, exc_info=True)
+
+    def _read_ok(self, key):
+        # end of a failure streak (the dict is empty in steady state: one truth test)
+        if self._fails and self._fails.pop(key, 0) >= FAIL_WARN_AFTER:
+            log.info("Poll read for %s recovered", key)
+
+    def _poll_batched(self, results=None):
+        """
+        One cycle via mw.read_vars(); falls back to per-variable retries for misses.
+        results: values already read by a merged multi-group read (skips the read).
+        """
+        if results is None:
+            try:
+                results = self.mw.read_vars(self.var_names, max_age_ms=self.reuse_age_ms())
+            except Exception as e:
+                self._read_failed("batched read", e)
+                return
+            self._read_ok("batched read")
+        retries = self.per_read_retries
+        debug = log.isEnabledFor(logging.DEBUG)
+        if not retries and not debug:
+            return   # nothing to retry, nothing to log: skip the per-variable loop
+        variables = self.mw.variables
+        read_with_retries = self.mw._read_with_retries
+        budget = self._retry_budget_s()
+        log_debug = log.debug
+        for name, val in results.items():
+            if val is None and retries > 0 and name in variables:
                 try:
-                    val = None
-                    # prefer calling wrapper-level read with retries if available:
-                    if hasattr(self.mw, "_read_with_retries"):
-                        val = self.mw._read_with_retries(name, self.per_read_retries)
-                    else:
-                        # fallback: direct read + convert (legacy behaviour)
-                        func, addr, count = self._map_to_modbus(wrapper)
-                        if func == "holding":
-                            regs = self.mw.client.read_holding_registers(addr, count, unit=self.unit_id)
-                            if regs is None:
-                                val = None
-                            else:
-                                val = convert_regs_to_value(wrapper, regs)
-                                # set local wrapper value
-                                wrapper.value = val
-                        elif func == "coils":
-                            coils = self.mw.client.read_coils(addr, count, unit=self.unit_id)
-                            val = bool(coils[0]) if coils else None
-                            if val is not None:
-                                wrapper.value = val
-                        elif func == "discrete":
-                            disc = self.mw.client.read_discrete_inputs(addr, count, unit=self.unit_id)
-                            val = bool(disc[0]) if disc else None
-                            if val is not None:
-                                wrapper.value = val
-
-                    logging.debug(f"[poll] {name} = {val}")
+                    val = read_with_retries(name, retries, budget)
+                    self._read_ok(name)
                 except Exception as e:
-                    logging.exception(f"Poll read error for {name}: {e}")
+                    self._read_failed(name, e)
+            if debug:
+                log_debug("[poll] %s = %s", name, val)
+
+    def _poll_each(self):
+        """
+        One cycle without read_vars() (legacy path):
+        - wrappers with _read_with_retries: one transaction per variable
+        - otherwise direct client reads, grouped into blocks (see _plan_reads)
+        """
+        variables = self.mw.variables   # published copy-on-write: plain lock-free lookups
+        debug = log.isEnabledFor(logging.DEBUG)   # checked once per cycle, not per variable
+        items = []
+        for name in self.var_names:
+            wrapper = variables.get(name)
+            if not wrapper:
+                if debug:
+                    log.debug("Poller: variable %s not found, skipping", name)
+                continue
+            items.append((name, wrapper))
+
+        if not hasattr(self.mw, "_read_with_retries"):
+            self._poll_grouped(items, debug)
+            return
+
+        # Option A: use ModbusWrapper's read retries (preferred, consistent)
+        budget = self._retry_budget_s()
+        for name, wrapper in items:
+            try:
+                val = self.mw._read_with_retries(name, self.per_read_retries, budget)
+                self._read_ok(name)
+                if debug:
+                    log.debug("[poll] %s = %s", name, val)
+            except Exception as e:
+                self._read_failed(name, e)
+
+    def _plan_reads(self, items):
+        """
+        Group the direct client reads of a cycle into blocks:
+        - (func, addr, count) per wrapper from _map_to_modbus, sorted per table
+        - a wrapper joins the current block if it starts at most mw.read_max_gap
+          registers after its end (default 0 = adjacent/overlapping only) and the
+          block stays within the Modbus limits (125 registers / 2000 bits)
+        items: [(name, wrapper)]
+        Returns [(func, start, count, [(name, wrapper, offset, width, decode)])],
+        decode from regs_decoder() for holding registers (None for bits).
+        """
+        by_func = {}
+        for name, wrapper in items:
+            (func, addr, count), parsed = self._resolve(name, wrapper)
+            by_func.setdefault(func, []).append((addr, count, name, wrapper, parsed))
 
-            cycles += 1
-            # sleep remainder or until stop event
-            elapsed = time.time() - start
-            to_wait = max(0, self.interval_ms / 1000.0 - elapsed)
-            if self._stop.wait(to_wait):
-                break
+        gap = int(getattr(self.mw, "read_max_gap", 0) or 0)
+        plan = []
+        for func, entries in by_func.items():
+            entries.sort(key=lambda e: e[0])
+            limit = MAX_READ.get(func, 125)
+            start = end = None
+            members = []
+            for addr, count, name, wrapper, parsed in entries:
+                if start is not None and addr <= end + gap and max(end, addr + count) - start <= limit:
+                    end = max(end, addr + count)
+                else:
+                    if start is not None:
+                        plan.append((func, start, end - start, members))
+                    start, end, members = addr, addr + count, []
+                decode = regs_decoder(wrapper, parsed) if func == "holding" else None
+                members.append((name, wrapper, addr - start, count, decode))
+            if start is not None:
+                plan.append((func, start, end - start, members))
+        return plan
 
-        logging.info(f"Poller loop finished (cycles={cycles})")
+    def _poll_grouped(self, items, debug):
+        """Direct client reads, one request per block of _plan_reads(); values decoded in place per wrapper."""
+        client = self.mw.client
+        readers = {"holding": client.read_holding_registers,
+                   "coils": client.read_coils,
+                   "discrete": client.read_discrete_inputs}
+        md_big_endian = getattr(self.mw, "md_big_endian", True)   # MD word order, once per cycle
+        # the blocks only change if a name now points to another wrapper (or the gap
+        # setting changed): plan once, then reuse it every cycle
+        wrappers = tuple(wrapper for _, wrapper in items)
+        gap = getattr(self.mw, "read_max_gap", 0)
+        plan = self._plan
+        if plan is None or plan[1] != gap or plan[0] != wrappers:
+            plan = self._plan = (wrappers, gap, self._plan_reads(items))
+        for func, start, count, members in plan[2]:
+            try:
+                data = readers[func](start, count, unit=self.unit_id)
+                self._read_ok((func, start, count))
+            except Exception as e:
+                self._read_failed((func, start, count), e)
+                data = None
+            for name, wrapper, off, width, decode in members:
+                val = None
+                if data and len(data) >= off + width:
+                    val = decode(data, off, md_big_endian) if decode else bool(data[off])
+                    wrapper.value = val   # set local wrapper value
+                if debug:
+                    log.debug("[poll] %s = %s", name, val)
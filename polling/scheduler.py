@@ -0,0 +1,245 @@
+# polling/scheduler.py
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+log = logging.getLogger(__name__)
+
+# shortest period the scheduler will re-arm with: interval_ms=0 (or a tiny value)
+# must not turn the loop into a busy spin re-dispatching the same poller
+MIN_INTERVAL_MS = 10
+
+
+def _use_batch_policy():
+    """
+    Move the calling thread to SCHED_BATCH (Linux only; no-op elsewhere).
+    Polling is background work: longer time slices and fewer wakeup
+    migrations for it, while the main program stays on SCHED_OTHER.
+    """
+    if not hasattr(os, "SCHED_BATCH"):
+        return
+    try:
+        # pid 0 = calling thread (Linux applies the policy per thread)
+        os.sched_setscheduler(0, os.SCHED_BATCH, os.sched_param(0))
+    except OSError as e:
+        log.debug("PollScheduler: SCHED_BATCH not applied: %s", e)
+
+
+class PollScheduler:
+    """
+    Single background thread driving every polling group.
+
+    Instead of one sleeping thread per group, the scheduler keeps a heap of
+    [next_deadline, seq, poller] entries. When the earliest deadline is due,
+    the poller's tick() is handed to a small bounded worker pool and the entry
+    is re-armed at next_deadline += interval.
+
+    Groups of the same ModbusWrapper that fall due within coalesce_ms of each
+    other are run as ONE merged read_vars() call (one set of Modbus requests
+    for all of them instead of one per group).
+    """
+    def __init__(self, max_workers: int = 8, batch_policy: bool = True, coalesce_ms: int = 20):
+        self.max_workers = int(max_workers)
+        self.batch_policy = bool(batch_policy)   # run scheduler + workers as SCHED_BATCH
+        self.coalesce_ms = int(coalesce_ms)      # 0 = never merge groups
+        self._heap = []                 # [deadline, seq, poller or None (cancelled)]
+        self._entries = {}              # poller -> heap entry
+        self._cancelled = 0             # cancelled entries still in the heap
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._thread = None
+        self._pool = None
+        self._merged_names = {}         # tuple(pollers) -> merged name tuple (same groups every tick)
+
+    def add(self, poller, first_delay_s: float = 0.0):
+        """Schedule poller.tick() every poller.interval_ms (first run after first_delay_s)."""
+        with self._cond:
+            if poller in self._entries:
+                return
+            entry = [time.monotonic() + first_delay_s, next(self._seq), poller]
+            self._entries[poller] = entry
+            heapq.heappush(self._heap, entry)
+            self._ensure_thread()
+            self._cond.notify()
+
+    def remove(self, poller):
+        """Cancel a poller; its heap entry is dropped lazily when popped."""
+        with self._cond:
+            entry = self._entries.pop(poller, None)
+            if entry is not None:
+                entry[2] = None
+                self._cancelled += 1
+                if self._cancelled > 32 and self._cancelled * 2 > len(self._heap):
+                    # add/remove churn (watch/unwatch): drop the dead entries in one pass
+                    # instead of letting them pile up behind long intervals
+                    self._heap = [e for e in self._heap if e[2] is not None]
+                    heapq.heapify(self._heap)
+                    self._cancelled = 0
+                self._merged_names.clear()   # don't keep removed pollers alive in the keys
+                self._cond.notify()
+
+    def is_scheduled(self, poller) -> bool:
+        with self._cond:
+            return poller in self._entries
+
+    def _ensure_thread(self):
+        # called with self._cond held
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix="poll-worker",
+                                            initializer=_use_batch_policy if self.batch_policy else None)
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, name="poll-scheduler", daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        if self.batch_policy:
+            _use_batch_policy()
+        while True:
+            with self._cond:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                entry = self._heap[0]
+                if entry[2] is None:                # cancelled
+                    heapq.heappop(self._heap)
+                    self._cancelled -= 1
+                    continue
+                delay = entry[0] - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+
+                # take every entry due now, plus those due within the coalesce window
+                horizon = time.monotonic() + self.coalesce_ms / 1000.0
+                due = []
+                while self._heap and self._heap[0][0] <= horizon:
+                    entry = heapq.heappop(self._heap)
+                    if entry[2] is None:            # cancelled
+                        self._cancelled -= 1
+                        continue
+                    due.append(entry)
+
+                now = time.monotonic()
+                for entry in due:
+                    # re-arm before dispatch so the cadence does not depend on tick duration
+                    # (absolute monotonic deadlines -> no drift accumulation)
+                    interval = max(entry[2].interval_ms, MIN_INTERVAL_MS) / 1000.0
+                    entry[0] += interval
+                    if entry[0] <= now:
+                        # fell behind by a full period: skip the missed ticks instead of bursting
+                        # catch-up ticks, but stay on the original grid (aligned pollers keep
+                        # their phase, so they still fall due together afterwards)
+                        missed = (now - entry[0]) // interval + 1
+                        entry[0] += missed * interval
+                        log.debug("PollScheduler: %s fell behind, %d tick(s) skipped",
+                                  entry[2].var_names, missed)
+                    heapq.heappush(self._heap, entry)
+                pollers = [entry[2] for entry in due]
+
+            # group by wrapper: groups sharing a PLC connection get one merged read
+            by_mw = {}
+            for poller in pollers:
+                if not poller.try_begin_tick():
+                    log.debug("PollScheduler: previous tick of %s still running, skipping", poller.var_names)
+                    continue
+                key = id(poller.mw) if hasattr(poller.mw, "read_vars") else id(poller)
+                by_mw.setdefault(key, []).append(poller)
+
+            for batch in by_mw.values():
+                try:
+                    if len(batch) == 1:
+                        self._pool.submit(self._run_tick, batch[0])
+                    else:
+                        self._pool.submit(self._run_merged, batch)
+                except RuntimeError:
+                    # pool shut down (interpreter exit)
+                    for poller in batch:
+                        poller.end_tick()
+                    return
+
+    def _run_tick(self, poller):
+        try:
+            keep = poller.tick()
+        except Exception as e:
+            log.exception("PollScheduler: tick failed for %s: %s", poller.var_names, e)
+            keep = True
+        finally:
+            poller.end_tick()
+        if not keep:
+            self.remove(poller)
+
+    def _run_merged(self, pollers):
+        """One cycle for several groups of the same wrapper: a single read_vars() for all."""
+        try:
+            active = []
+            for poller in pollers:
+                try:
+                    state = poller.begin_cycle()
+                except Exception as e:
+                    log.exception("PollScheduler: tick failed for %s: %s", poller.var_names, e)
+                    continue
+                if state is None:
+                    active.append(poller)
+                elif not state:
+                    self.remove(poller)
+            if not active:
+                return
+
+            mw = active[0].mw
+            # the same groups fall due together tick after tick: merge their name lists
+            # once (a stable tuple also hits the wrapper's cached read plan)
+            key = tuple(active)
+            names = self._merged_names.get(key)
+            if names is None:
+                if len(self._merged_names) >= 64:
+                    self._merged_names.clear()
+                names = self._merged_names[key] = tuple(
+                    dict.fromkeys(n for poller in active for n in poller.var_names))
+            try:
+                results = mw.read_vars(names, max_age_ms=min(p.reuse_age_ms() for p in active))
+            except Exception as e:
+                log.exception("Poll merged read error: %s", e)
+                results = {}
+
+            for poller in active:
+                try:
+                    poller._poll_batched({n: results.get(n) for n in poller.var_names})
+                    keep = poller.finish_cycle()
+                except Exception as e:
+                    log.exception("PollScheduler: tick failed for %s: %s", poller.var_names, e)
+                    keep = True
+                if not keep:
+                    self.remove(poller)
+        finally:
+            for poller in pollers:
+                poller.end_tick()
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_scheduler(max_workers: int = None) -> PollScheduler:
+    """
+    Process-wide scheduler shared by all Poller instances.
+    max_workers: size of its worker pool, only before the first group starts
+    (one worker per PLC doing I/O at the same time: blocking socket calls release
+    the GIL, so cycles of different PLCs overlap; default 8)
+    """
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = PollScheduler() if max_workers is None else PollScheduler(max_workers=max_workers)
+        elif max_workers is not None and max_workers != _default.max_workers:
+            with _default._cond:
+                if _default._pool is None:
+                    _default.max_workers = int(max_workers)
+                else:
+                    log.warning("PollScheduler already running with %d workers, max_workers=%s ignored",
+                                _default.max_workers, max_workers)
+        return _default
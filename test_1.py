@@ -1,5 +1,6 @@
 # test_1.py
 # Comprehensive quick Modbus test for Graziano PLC (read/write, coils, bytes, bits, MD)
+import socket
 import time
 import traceback
 from pyModbusTCP.client import ModbusClient
@@ -44,6 +45,23 @@ def connect_client(unit_id):
     return c
 
 
+def set_nodelay(c):
+    """
+    TCP_NODELAY on the client socket (after open()): Modbus frames are tiny and
+    Nagle would hold each one back ~40 ms, skewing the timings seen here.
+    pyModbusTCP keeps the socket in _sock (>= 0.2) or in a name-mangled __sock.
+    """
+    for attr in ("_sock", "_ModbusClient__sock", "_client_socket"):
+        sock = getattr(c, attr, None)
+        if isinstance(sock, socket.socket):
+            try:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                return True
+            except OSError:
+                return False
+    return False
+
+
 def safe_sleep():
     time.sleep(SLEEP)
 
@@ -88,6 +106,9 @@ def write_single_coil(c, addr, value):
         return f"EXC: {e}"
 
 
+# shift of an MB byte inside its parent word, indexed by num & 1 (even = low byte)
+_BYTE_SHIFT = (0, 8)
+
 def read_item(c, kind, num, bit=None):
     # replicate the logic used in your blueprint (parent index logic)
     if kind == "MW":
@@ -100,20 +121,15 @@ def read_item(c, kind, num, bit=None):
         parent = num // 2
         regs = read_holding(c, parent, 1)
         if isinstance(regs, list) and regs:
-            word_val = regs[0]
-            if num % 2 == 0:
-                return word_val & 0xFF
-            else:
-                return (word_val >> 8) & 0xFF
+            # even MB = low byte, odd MB = high byte
+            return (regs[0] >> _BYTE_SHIFT[num & 1]) & 0xFF
         return regs
     if kind == "MX":
-        # parent same as MB: num //2, then select byte then bit
+        # parent same as MB: num //2, then select byte then bit (one shift)
         parent = num // 2
         regs = read_holding(c, parent, 1)
         if isinstance(regs, list) and regs:
-            word_val = regs[0]
-            byte_val = (word_val >> ((num % 2) * 8)) & 0xFF
-            return bool((byte_val >> bit) & 1)
+            return bool((regs[0] >> (_BYTE_SHIFT[num & 1] + bit)) & 1)
         return regs
     return None
 
@@ -135,6 +151,8 @@ def run_all_tests():
         except Exception as e:
             print("open() raised exception:", e)
         print("open() ->", ok)
+        if ok:
+            print("TCP_NODELAY ->", set_nodelay(c))
         safe_sleep()
 
         # raw socket info from client if open
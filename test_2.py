@@ -5,9 +5,12 @@
 # - Detailed per-attempt logging and exceptions
 # - Non-destructive by default (writes disabled); enable writes manually
 
+import socket
 import time
 import traceback
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pyModbusTCP.client import ModbusClient
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
@@ -18,6 +21,7 @@ PLC_PORT = 502              # 1502 for simulator; 502 for real PLC
 UNIT_IDS_TO_TRY = [0, 1]    # Graziano confirmed 1, but we also try 0
 SLEEP = 0.5                 # breathing space between operations (seconds)
 DO_WRITES = False           # WARNING: set True ONLY if you understand effects on real PLC
+PARALLEL_READS = 4          # connections reading the detailed checks at once (1 = serial on one)
 # ---------------------------------------
 
 # Variables to check (same as your variables.txt semantics)
@@ -48,6 +52,22 @@ def connect_client(unit_id):
         pass
     return c
 
+def set_nodelay(c):
+    """
+    TCP_NODELAY on the client socket (after open()): Modbus frames are tiny and
+    Nagle would hold each one back ~40 ms, skewing the timings seen here.
+    pyModbusTCP keeps the socket in _sock (>= 0.2) or in a name-mangled __sock.
+    """
+    for attr in ("_sock", "_ModbusClient__sock", "_client_socket"):
+        sock = getattr(c, attr, None)
+        if isinstance(sock, socket.socket):
+            try:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                return True
+            except OSError:
+                return False
+    return False
+
 def safe_sleep():
     time.sleep(SLEEP)
 
@@ -109,6 +129,82 @@ def interpret_result(obj):
         return f"Bits: {obj.bits}"
     return repr(obj)
 
+def expand_check(kind, num):
+    """(label, read function, address, count) of every attempt for one CHECKS item."""
+    jobs = []
+    if kind == "MW":
+        jobs.append(("holding_raw", try_read_holding, num, 1))
+    elif kind == "MD":
+        jobs.append(("holding_raw_md", try_read_holding, num, 2))
+    elif kind in ("MB", "MX"):
+        jobs.append(("holding_parent_raw", try_read_holding, num // 2, 1))
+    elif kind == "IX":
+        jobs.append(("discrete_raw", try_read_discrete, num, 1))
+
+    for off in ADDRESS_OFFSETS:
+        if kind in ("MW", "MD"):
+            jobs.append((f"holding_off+{off}", try_read_holding, off + num, 2 if kind == "MD" else 1))
+        elif kind in ("MB", "MX"):
+            jobs.append((f"holding_parent_off+{off}", try_read_holding, (off + num) // 2, 1))
+        elif kind == "IX":
+            jobs.append((f"discrete_off+{off}", try_read_discrete, off + num, 1))
+
+    if kind in ("MX", "MB", "MW"):
+        jobs.append(("coils_raw", try_read_coils, num, 1))
+        for off in ADDRESS_OFFSETS:
+            jobs.append((f"coils_off+{off}", try_read_coils, off + num, 1))
+    return jobs
+
+def run_jobs(c, unit, jobs):
+    """
+    Run (label, fn, addr, count) jobs, results returned in job order.
+    - PARALLEL_READS workers, each with its OWN client/connection (a ModbusClient
+      is not shared between threads), each pacing its own reads by SLEEP
+    - serial on c if PARALLEL_READS <= 1 or the PLC refuses the extra connections
+    """
+    def serial():
+        out = []
+        for _, fn, addr, cnt in jobs:
+            out.append(interpret_result(fn(c, addr, cnt)))
+            safe_sleep()
+        return out
+
+    if PARALLEL_READS <= 1 or len(jobs) <= 1:
+        return serial()
+
+    local = threading.local()
+    clients = []
+    refused = []
+
+    def run(job):
+        _, fn, addr, cnt = job
+        cl = getattr(local, "client", None)
+        if cl is None:
+            cl = local.client = connect_client(unit)
+            clients.append(cl)
+            if not cl.open():
+                refused.append(cl)
+            else:
+                set_nodelay(cl)
+        r = fn(cl, addr, cnt)
+        safe_sleep()
+        return interpret_result(r)
+
+    try:
+        with ThreadPoolExecutor(max_workers=PARALLEL_READS) as ex:
+            out = list(ex.map(run, jobs))
+    finally:
+        for cl in clients:
+            try:
+                cl.close()
+            except Exception:
+                pass
+    if refused:
+        # small PLCs allow only a few TCP sessions: redo everything on the main connection
+        print(f" ({len(refused)} extra connection(s) refused, reading serially)")
+        return serial()
+    return out
+
 def run_tests():
     print("\n=== MODBUS DIAGNOSTIC TEST 2 START ===\n")
     print(f"Target PLC: {PLC_HOST}:{PLC_PORT}  units={UNIT_IDS_TO_TRY}\n")
@@ -123,6 +219,8 @@ def run_tests():
             logging.error("open() raised: %s", e)
             ok = False
         print("open() ->", ok)
+        if ok:
+            print("TCP_NODELAY ->", set_nodelay(c))
         safe_sleep()
         print(f"Connected to {PLC_HOST}:{PLC_PORT}, unit_id={unit}, is_open={c.is_open()}\n")
 
@@ -141,54 +239,18 @@ def run_tests():
         # Detailed checks
         print("\n-- detailed checks for variables.txt items --")
         summary = {}
+        plan = []
         for label, info in CHECKS.items():
             kind = info[0]
             num = info[1]
             bit = info[2] if len(info) > 2 else None
-            print(f"\n{label} ({kind} {num}{'.'+str(bit) if bit is not None else ''})")
-            results = []
-            if kind == "MW":
-                r = try_read_holding(c, num, 1)
-                results.append(("holding_raw", num, interpret_result(r)))
-            elif kind == "MD":
-                r = try_read_holding(c, num, 2)
-                results.append(("holding_raw_md", num, interpret_result(r)))
-            elif kind in ("MB", "MX"):
-                parent = num // 2
-                r = try_read_holding(c, parent, 1)
-                results.append(("holding_parent_raw", parent, interpret_result(r)))
-            elif kind == "IX":
-                r = try_read_discrete(c, num, 1)
-                results.append(("discrete_raw", num, interpret_result(r)))
-            safe_sleep()
+            plan.append((label, kind, num, bit, expand_check(kind, num)))
+        # all attempts of all items in one pool run (was: one read + SLEEP at a time)
+        values = iter(run_jobs(c, unit, [job for *_, jobs in plan for job in jobs]))
 
-            for off in ADDRESS_OFFSETS:
-                try:
-                    if kind in ("MW", "MD"):
-                        addr = off + num
-                        cnt = 2 if kind == "MD" else 1
-                        r = try_read_holding(c, addr, cnt)
-                        results.append((f"holding_off+{off}", addr, interpret_result(r)))
-                    elif kind in ("MB", "MX"):
-                        parent = (off + num) // 2
-                        r = try_read_holding(c, parent, 1)
-                        results.append((f"holding_parent_off+{off}", parent, interpret_result(r)))
-                    elif kind == "IX":
-                        addr = off + num
-                        r = try_read_discrete(c, addr, 1)
-                        results.append((f"discrete_off+{off}", addr, interpret_result(r)))
-                except Exception as e:
-                    results.append((f"error_off+{off}", off, f"EXC: {e}"))
-                safe_sleep()
-
-            if kind in ("MX", "MB", "MW"):
-                r_coil = try_read_coils(c, num, 1)
-                results.append(("coils_raw", num, interpret_result(r_coil)))
-                safe_sleep()
-                for off in ADDRESS_OFFSETS:
-                    r_coil = try_read_coils(c, off + num, 1)
-                    results.append((f"coils_off+{off}", off + num, interpret_result(r_coil)))
-                    safe_sleep()
+        for label, kind, num, bit, jobs in plan:
+            print(f"\n{label} ({kind} {num}{'.'+str(bit) if bit is not None else ''})")
+            results = [(tname, addr, next(values)) for tname, _, addr, _ in jobs]
 
             print(" attempts:")
             for tname, a, val in results:
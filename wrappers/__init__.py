@@ -5,5 +5,7 @@ from .flag import Flag    # import Flag into package namespace
 from .word import Word    # import Word class
 from .byte import Byte    # import Byte class
 from .dword import DWord  # import DWord class
+from .kinds import KIND_FLAG, KIND_BYTE, KIND_WORD, KIND_DWORD, KIND_TIMER  # type codes
 
-__all__ = ["Flag", "Word", "Byte", "DWord"]  # public API
+__all__ = ["Flag", "Word", "Byte", "DWord",
+           "KIND_FLAG", "KIND_BYTE", "KIND_WORD", "KIND_DWORD", "KIND_TIMER"]  # public API
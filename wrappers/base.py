@@ -0,0 +1,97 @@
+# wrappers/base.py
+# Common base of the wrapper classes: one stable interface for every variable.
+
+import itertools
+
+# process-wide change sequence: every value change stamps its wrapper with the next
+# number, so "changed after seq X" is one int compare per wrapper (see changed_since)
+next_seq = itertools.count(1).__next__
+
+class _VarBase:
+    """
+    Shared interface and common fields for Flag/Byte/Word/DWord (and TimerWrapper):
+    - every wrapper has isChanged(), so callers need no hasattr() guard
+    - readonly / initial_value / description always resolve (set in __init__),
+      so callers need no getattr(obj, ..., default)
+    Change tracking: the value setters stamp _gen with next_seq() (process-wide,
+    increasing), so generations of different wrappers are comparable.
+    value is None until the first read, write or ':=' initial value: "never read" stays
+    distinct from 0 for callers (the first store counts as a change).
+    All wrappers use __slots__ (no per-instance __dict__): fields are the ones
+    listed here plus each subclass's own slots; other attributes can't be added.
+    """
+    KIND = None             # type code, set by each subclass (see kinds.py)
+    __slots__ = ("name", "address", "description", "readonly", "initial_value", "_gen", "_seen_gen",
+                 "_repr")
+
+    def __init__(self, name, address, description=""):
+        self.name = name                    # variable name
+        self.address = address              # address string like "%MW10"
+        self.description = description      # human-readable description
+        self.readonly = False               # set from variables.txt by ModbusWrapper
+        self.initial_value = None           # ':= value' from variables.txt
+        self._gen = 0                       # next_seq() stamp of the last value change
+        self._seen_gen = 0                  # generation last reported by isChanged()
+        self._repr = None                   # (generation, repr text), see the subclasses' __repr__
+
+    def isChanged(self, since=None):
+        """
+        Return True if changed since last check, and reset the changed flag.
+        This matches the requirement: isChanged() is re-set each time it's read.
+        isChanged(seq): True if changed after the sequence number seq (see
+        ModbusWrapper.change_seq()); read-only, the flag is not reset.
+        """
+        # read _gen once: a change stamped by a polling thread between the compare and
+        # the reset stays unreported for the next call instead of being swallowed
+        g = self._gen
+        if since is not None:
+            return g > since
+        changed = g != self._seen_gen
+        self._seen_gen = g    # reset on access
+        return changed
+
+    def resetChanged(self):
+        """Explicitly reset changed flag (alternative to isChanged())."""
+        self._seen_gen = self._gen
+
+    @property
+    def generation(self):
+        """Change stamp: compare with a saved value to track changes independently of isChanged()."""
+        return self._gen
+
+    @property
+    def _changed(self):
+        # legacy flag view (ModbusWrapper._set_value sets it directly)
+        return self._gen != self._seen_gen
+
+    @_changed.setter
+    def _changed(self, flag):
+        if flag:
+            # a change happening now: always a new stamp (also if one is still unreported),
+            # or changed_since() of a later seq would miss it
+            self._gen = next_seq()
+        else:
+            self._seen_gen = self._gen
+
+    def __setstate__(self, state):
+        """
+        pickle/copy of a slotted wrapper: state is (None, {slot: value}).
+        _gen/_seen_gen are stamps of the process that pickled it, meaningless against
+        this process's next_seq(): keep only whether a change was still unreported.
+        """
+        for field, val in state[1].items():
+            setattr(self, field, val)
+        self._repr = None   # keyed by a stamp of the other process too
+        if self._gen != self._seen_gen:
+            self._seen_gen = 0
+            self._gen = next_seq()
+        else:
+            self._gen = self._seen_gen = 0
+
+    def _set_raw(self, val):
+        """
+        Store a value that is already of the wrapper's own type (bool for bits, 0..255
+        for bytes, 0..65535 for words); used by ModbusWrapper's alias sync.
+        Flag/Byte/Word skip their setter's coercion here; this default just uses it.
+        """
+        self.value = val
@@ -1,15 +1,17 @@
 # wrappers/byte.py
 # BYTE (8-bit) wrapper — same pattern as Word but kept separate for clarity.
 
-class Byte:
+from .base import _VarBase, next_seq
+from .kinds import KIND_BYTE
+
+class Byte(_VarBase):
     """Represents an 8-bit BYTE with change tracking."""
+    KIND = KIND_BYTE   # type code for fast dispatch (see kinds.py)
+    __slots__ = ("_value",)   # value only: the change history is the _gen stamp
+
     def __init__(self, name, address, description=""):
-        self.name = name
-        self.address = address
-        self.description = description
+        super().__init__(name, address, description)
         self._value = None
-        self._last_value = None
-        self._changed = False
 
     @property
     def value(self):
@@ -19,26 +21,29 @@ class Byte:
     @value.setter
     def value(self, val):
         """Set byte value, attempt integer conversion when possible."""
-        if val is not None:
+        # ints already in 0..255 (the Modbus case) skip the conversion
+        if val is not None and (val.__class__ is not int or val & ~0xFF):
             try:
                 val = int(val) & 0xFF   # force to 0..255
             except Exception:
                 pass
         if self._value != val:
-            self._changed = True
-            self._last_value = self._value
-        self._value = val
+            self._gen = next_seq()
+            self._value = val
 
-    def update(self, new_value):
-        """Update from Modbus read or external source."""
-        self.value = new_value
+    def _set_raw(self, val):
+        """Store an already coerced value (alias sync): no conversion, same change tracking."""
+        if self._value != val:
+            self._gen = next_seq()
+            self._value = val
 
-    def isChanged(self):
-        """Return and reset changed flag."""
-        changed = self._changed
-        self._changed = False
-        return changed
+    # update from Modbus read or external source: the value setter itself (one call,
+    # no update() -> self.value -> setter trampoline)
+    update = value.fset
 
     def __repr__(self):
-        """Developer-friendly representation."""
-        return f"<Byte {self.name}={self._value}>"
+        """Developer-friendly representation (formatted again only after a value change)."""
+        r = self._repr
+        if r is None or r[0] != self._gen:
+            r = self._repr = (self._gen, f"<Byte {self.name}={self._value}>")
+        return r[1]
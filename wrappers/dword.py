@@ -1,15 +1,17 @@
 # wrappers/dword.py
 # DWORD (32-bit) wrapper — same pattern as Word but for 32-bit values.
 
-class DWord:
+from .base import _VarBase, next_seq
+from .kinds import KIND_DWORD
+
+class DWord(_VarBase):
     """Represents a 32-bit DWORD with change tracking."""
+    KIND = KIND_DWORD   # type code for fast dispatch (see kinds.py)
+    __slots__ = ("_value",)   # value only: the change history is the _gen stamp
+
     def __init__(self, name, address, description=""):
-        self.name = name
-        self.address = address
-        self.description = description
+        super().__init__(name, address, description)
         self._value = None
-        self._last_value = None
-        self._changed = False
 
     @property
     def value(self):
@@ -19,26 +21,22 @@ class DWord:
     @value.setter
     def value(self, val):
         """Set 32-bit value, try to convert to int if possible."""
-        if val is not None:
+        if val.__class__ is not int and val is not None:
             try:
                 val = int(val)
             except Exception:
                 pass
         if self._value != val:
-            self._changed = True
-            self._last_value = self._value
-        self._value = val
-
-    def update(self, new_value):
-        """Update from Modbus read or external source."""
-        self.value = new_value
+            self._gen = next_seq()
+            self._value = val
 
-    def isChanged(self):
-        """Return and reset change flag."""
-        changed = self._changed
-        self._changed = False
-        return changed
+    # update from Modbus read or external source: the value setter itself (one call,
+    # no update() -> self.value -> setter trampoline)
+    update = value.fset
 
     def __repr__(self):
-        """Developer-friendly representation."""
-        return f"<DWord {self.name}={self._value}>"
+        """Developer-friendly representation (formatted again only after a value change)."""
+        r = self._repr
+        if r is None or r[0] != self._gen:
+            r = self._repr = (self._gen, f"<DWord {self.name}={self._value}>")
+        return r[1]
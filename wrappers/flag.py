@@ -1,15 +1,17 @@
 # wrappers/flag.py
 # Simple BOOL wrapper (Flag) with change-tracking and helper methods.
 
-class Flag:
+from .base import _VarBase, next_seq
+from .kinds import KIND_FLAG
+
+class Flag(_VarBase):
     """Represents a boolean flag (BOOL) with change tracking."""
+    KIND = KIND_FLAG   # type code for fast dispatch (see kinds.py)
+    __slots__ = ("_value",)   # value only: the change history is the _gen stamp
+
     def __init__(self, name, address, description=""):
-        self.name = name                    # variable name (string)
-        self.address = address              # address string like "%IX0.0"
-        self.description = description      # human-readable description
+        super().__init__(name, address, description)
         self._value = None                  # actual stored value (private)
-        self._last_value = None             # previous value (for comparison)
-        self._changed = False               # flag changed state (True/False)
 
     @property
     def value(self):
@@ -19,11 +21,17 @@ class Flag:
     @value.setter
     def value(self, val):
         """Setter for the value property — updates and sets changed flag."""
-        val = bool(val) if val is not None else None   # coerce to bool or None
-        if self._value != val:                          # check if changed
-            self._changed = True                       # mark as changed
-            self._last_value = self._value             # store last value
-        self._value = val                               # set new value
+        if val.__class__ is not bool and val is not None:
+            val = bool(val)                             # coerce to bool (None stays None)
+        if self._value is not val:                      # check if changed (True/False/None are singletons)
+            self._gen = next_seq()                     # new generation
+            self._value = val                           # set new value
+
+    def _set_raw(self, val):
+        """Store an already coerced value (alias sync): no conversion, same change tracking."""
+        if self._value is not val:
+            self._gen = next_seq()
+            self._value = val
 
     def on(self):
         """Convenience: set flag to True."""
@@ -33,18 +41,9 @@ class Flag:
         """Convenience: set flag to False."""
         self.value = False
 
-    def update(self, new_value):
-        """Update value from outside (e.g., Modbus read)."""
-        self.value = new_value
-
-    def isChanged(self):
-        """
-        Return True if changed since last check, and reset the changed flag.
-        This matches the requirement: isChanged() is re-set each time it's read.
-        """
-        changed = self._changed
-        self._changed = False    # reset on access
-        return changed
+    # update value from outside (e.g., Modbus read): the value setter itself (one call,
+    # no update() -> self.value -> setter trampoline)
+    update = value.fset
 
     def isSet(self):
         """Return True if flag is logically set (True)."""
@@ -55,5 +54,8 @@ class Flag:
         return not bool(self._value)
 
     def __repr__(self):
-        """Developer-friendly representation."""
-        return f"<Flag {self.name}={self._value}>"
+        """Developer-friendly representation (formatted again only after a value change)."""
+        r = self._repr
+        if r is None or r[0] != self._gen:
+            r = self._repr = (self._gen, f"<Flag {self.name}={self._value}>")
+        return r[1]
@@ -0,0 +1,9 @@
+# wrappers/kinds.py
+# Integer type codes for the wrapper classes: hot paths compare obj.KIND
+# (one int compare) instead of obj.__class__.__name__ strings.
+
+KIND_FLAG = 0    # Flag  (BOOL)
+KIND_BYTE = 1    # Byte  (BYTE)
+KIND_WORD = 2    # Word  (WORD)
+KIND_DWORD = 3   # DWord (DWORD)
+KIND_TIMER = 4   # TimerWrapper (TIME)
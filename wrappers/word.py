@@ -1,15 +1,17 @@
 # wrappers/word.py
 # WORD (16-bit) wrapper with change-tracking and numeric setter/getter.
 
-class Word:
+from .base import _VarBase, next_seq
+from .kinds import KIND_WORD
+
+class Word(_VarBase):
     """Represents a 16-bit WORD with change tracking."""
+    KIND = KIND_WORD   # type code for fast dispatch (see kinds.py)
+    __slots__ = ("_value",)   # value only: the change history is the _gen stamp
+
     def __init__(self, name, address, description=""):
-        self.name = name                    # variable name
-        self.address = address              # address like "%MW10"
-        self.description = description      # description string
+        super().__init__(name, address, description)
         self._value = None                  # stored numeric value
-        self._last_value = None             # previous numeric value
-        self._changed = False               # change flag
 
     @property
     def value(self):
@@ -19,36 +21,31 @@ class Word:
     @value.setter
     def value(self, val):
         """Set numeric value, update changed flag if different."""
-        # attempt to coerce to int unless None
-        if val is not None:
+        # ints already in 0..65535 (the Modbus case) skip the conversion; others are
+        # coerced to int unless None
+        if val is not None and (val.__class__ is not int or val & ~0xFFFF):
             try:
-                val = int(val)
+                val = int(val) & 0xFFFF   # force to 0..65535 (what one register holds)
             except Exception:
                 # if conversion fails, keep the raw value
                 pass
         if self._value != val:              # compare with previous
-            self._changed = True            # mark changed if different
-            self._last_value = self._value  # save last value
-        self._value = val                   # set current value
-
-    def set(self, val):
-        """Alias for setting value (explicit method)."""
-        self.value = val
-
-    def update(self, new_value):
-        """Update from Modbus read or external source."""
-        self.value = new_value
+            self._gen = next_seq()          # new generation
+            self._value = val               # set current value
 
-    def isChanged(self):
-        """Return and reset the changed flag (resets on read)."""
-        changed = self._changed
-        self._changed = False
-        return changed
+    def _set_raw(self, val):
+        """Store an already coerced value (alias sync): no conversion, same change tracking."""
+        if self._value != val:
+            self._gen = next_seq()
+            self._value = val
 
-    def resetChanged(self):
-        """Explicitly reset changed flag (alternative to isChanged())."""
-        self._changed = False
+    # set() (explicit method) and update() (Modbus read or external source) are the
+    # value setter itself: one call, no set() -> self.value -> setter trampoline
+    set = update = value.fset
 
     def __repr__(self):
-        """Developer-friendly representation."""
-        return f"<Word {self.name}={self._value}>"
+        """Developer-friendly representation (formatted again only after a value change)."""
+        r = self._repr
+        if r is None or r[0] != self._gen:
+            r = self._repr = (self._gen, f"<Word {self.name}={self._value}>")
+        return r[1]